@@ -0,0 +1,125 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api.conditional import bump_generation, get_generation
+
+
+class TokenCache:
+    """Ограниченный LRU-кэш токенов с временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def evict_key(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            for key in [
+                key
+                for key, (_, ((user, _), _)) in self._data.items()
+                if user.pk == user_id
+            ]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def auth_scope(user_id):
+    return f"auth:{user_id}"
+
+
+def evict_user(user_id):
+    """Сбрасывает закешированного пользователя во всех процессах: в своём
+    сразу, в остальных - сменой поколения после коммита."""
+    token_cache.evict_user(user_id)
+    bump_generation(auth_scope(user_id))
+
+
+def own_copy(user, token):
+    """Копия закешированных объектов для одного запроса: запросы
+    не должны менять общий экземпляр пользователя."""
+    user = copy.copy(user)
+    token = copy.copy(token)
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кэшированием пользователя в процессе.
+
+    Запись кэша хранит поколение auth:<id> из общего кэша и принимается,
+    только пока оно не изменилось: одно чтение из кэша вместо запроса
+    к базе. Каждый запрос получает свою копию пользователя, TTL
+    ограничивает жизнь записи, если сброс поколения не дошёл до кэша."""
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            (user, token), generation = entry
+            if generation == get_generation(auth_scope(user.pk)):
+                return own_copy(user, token)
+            token_cache.evict_key(key)
+        # Поколение читается до пользователя: изменение, пришедшее между
+        # двумя запросами, оставит в записи старое поколение, и её
+        # отбросит следующий запрос.
+        user_id = (
+            Token.objects.filter(key=key)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if user_id is not None:
+            generation = get_generation(auth_scope(user_id))
+        user, token = super().authenticate_credentials(key)
+        if user.pk == user_id:
+            token_cache.set(key, ((user, token), generation))
+        return own_copy(user, token)
@@ -0,0 +1,83 @@
+from django.db import transaction
+
+from api.conditional import bump_generation
+from recipes.deletion import delete_rows
+from recipes.models import Event
+from recipes.outbox import record_many
+
+CREATED = "created"
+EXISTS = "exists"
+DELETED = "deleted"
+NOT_FOUND = "not_found"
+SELF = "self"
+
+
+def add_links(user, ids, model, field, target_model, forbidden=()):
+    """Добавляет связи user -> ids одним bulk_create.
+
+    Выполняет пять запросов независимо от размера пакета (проверка
+    целей, существующие связи, вставка, выборка вставленных строк
+    и события outbox) и возвращает статус для каждого id."""
+    found = set(
+        target_model.objects.filter(id__in=ids).values_list("id", flat=True)
+    )
+    linked = set(
+        model.objects.filter(user=user, **{f"{field}__in": ids}).values_list(
+            field, flat=True
+        )
+    )
+    statuses = {}
+    to_create = []
+    for pk in ids:
+        if pk in forbidden:
+            statuses[pk] = SELF
+        elif pk not in found:
+            statuses[pk] = NOT_FOUND
+        elif pk in linked:
+            statuses[pk] = EXISTS
+        else:
+            statuses[pk] = CREATED
+            to_create.append(model(user=user, **{field: pk}))
+    if to_create:
+        with transaction.atomic():
+            model.objects.bulk_create(to_create, ignore_conflicts=True)
+            # С ignore_conflicts объекты остаются без id, поэтому события
+            # пишутся по строкам из базы. Строка параллельного запроса
+            # получит второе событие: доставка и так не менее одного раза.
+            record_many(
+                model.objects.filter(
+                    user=user,
+                    **{
+                        f"{field}__in": [
+                            getattr(link, field) for link in to_create
+                        ]
+                    },
+                ),
+                Event.CREATED,
+            )
+        bump_generation(f"viewer:{user.pk}")
+    return [{"id": pk, "status": statuses[pk]} for pk in ids]
+
+
+def remove_links(user, ids, model, field):
+    """Удаляет связи user -> ids одним DELETE без сигналов post_delete
+    (см. delete_rows): события outbox пишутся одним bulk_create, всего
+    три запроса независимо от размера пакета."""
+    with transaction.atomic():
+        linked = list(
+            model.objects.select_for_update().filter(
+                user=user, **{f"{field}__in": ids}
+            )
+        )
+        if linked:
+            delete_rows(
+                model.objects.filter(pk__in=[link.pk for link in linked])
+            )
+            record_many(linked, Event.DELETED)
+    found = {getattr(link, field) for link in linked}
+    if found:
+        bump_generation(f"viewer:{user.pk}")
+    return [
+        {"id": pk, "status": DELETED if pk in found else NOT_FOUND}
+        for pk in ids
+    ]
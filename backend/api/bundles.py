@@ -0,0 +1,140 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+
+from api.conditional import CATALOG, get_generation
+from api.renderers import FastJSONRenderer
+from api.serializers import IngredientSerializer, TagSerializer
+from app.routers import use_primary
+from recipes.models import Ingredient, Tag
+
+logger = logging.getLogger(__name__)
+
+CATALOGS = {
+    "tags": (Tag, TagSerializer),
+    "ingredients": (Ingredient, IngredientSerializer),
+}
+MANIFEST = "manifest.json"
+
+manifest_cache = {}
+built = {}
+
+
+def bundle_dir():
+    return os.path.join(settings.MEDIA_ROOT, settings.CATALOG_BUNDLE_DIR)
+
+
+def bundle_url(name):
+    return f"{settings.MEDIA_URL}{settings.CATALOG_BUNDLE_DIR}/{name}"
+
+
+def write_file(name, content):
+    """Атомарная запись: nginx не увидит файл наполовину записанным."""
+    path = os.path.join(bundle_dir(), name)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(content)
+    os.replace(temporary, path)
+
+
+def build_bundles():
+    """Пишет снимки справочников с хешем содержимого в имени, их
+    gzip-версии для gzip_static в nginx и манифест с текущими версиями."""
+    os.makedirs(bundle_dir(), exist_ok=True)
+    renderer = FastJSONRenderer()
+    manifest = {}
+    for catalog, (model, serializer_class) in CATALOGS.items():
+        content = renderer.render(
+            serializer_class(model.objects.all(), many=True).data
+        )
+        version = hashlib.sha256(content).hexdigest()[:16]
+        name = f"{catalog}.{version}.json"
+        if not os.path.exists(os.path.join(bundle_dir(), name)):
+            write_file(name, content)
+            write_file(f"{name}.gz", gzip.compress(content, 9, mtime=0))
+        manifest[catalog] = {
+            "version": version,
+            "url": bundle_url(name),
+            "size": len(content),
+        }
+    manifest = {
+        "version": hashlib.sha256(
+            json.dumps(manifest, sort_keys=True).encode()
+        ).hexdigest()[:16],
+        **manifest,
+    }
+    write_file(MANIFEST, json.dumps(manifest, indent=2).encode())
+    prune_bundles(manifest)
+    return manifest
+
+
+def prune_bundles(manifest):
+    """Удаляет старые снимки, оставляя их на CATALOG_BUNDLE_KEEP секунд
+    для клиентов со старым манифестом."""
+    current = {
+        os.path.basename(entry["url"])
+        for key, entry in manifest.items()
+        if key != "version"
+    }
+    threshold = time.time() - settings.CATALOG_BUNDLE_KEEP
+    for entry in os.scandir(bundle_dir()):
+        name = entry.name.removesuffix(".gz")
+        if (
+            entry.name != MANIFEST
+            and name not in current
+            and entry.stat().st_mtime < threshold
+        ):
+            os.remove(entry.path)
+
+
+def current_manifest():
+    """Манифест с диска; перечитывается только после пересборки."""
+    try:
+        mtime = os.stat(os.path.join(bundle_dir(), MANIFEST)).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if manifest_cache.get("mtime") != mtime:
+        with open(os.path.join(bundle_dir(), MANIFEST), "rb") as file:
+            manifest_cache.update(mtime=mtime, manifest=json.load(file))
+    return manifest_cache["manifest"]
+
+
+class CatalogBundleMixin:
+    """Заголовок X-Catalog-Bundle со ссылкой на готовый снимок
+    справочника, который nginx отдаёт без обращения к Django."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        bundle = current_manifest().get(self.basename)
+        if bundle:
+            response["X-Catalog-Bundle"] = bundle["url"]
+        return response
+
+
+def refresh_bundles():
+    """Пересобирает бандлы, если каталог изменился после прошлой сборки.
+
+    Вызывается в цикле воркера выгрузок, поэтому запись тэга или
+    ингредиента не ждёт сборки справочников. Сборка читает основную
+    базу: снимок с отставшей реплики остался бы до следующего
+    изменения каталога."""
+    generation = get_generation(CATALOG)
+    if built.get("generation") == generation:
+        return False
+    token = use_primary.set(True)
+    try:
+        build_bundles()
+    except Exception:
+        logger.exception("Не удалось пересобрать бандлы справочников")
+        return False
+    finally:
+        use_primary.reset(token)
+    built["generation"] = generation
+    return True
@@ -0,0 +1,50 @@
+import gzip
+import re
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "text/",
+)
+ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?")
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for part in header.split(","):
+        match = ENCODING_RE.match(part)
+        if match and float(match.group(2) or 1):
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(content, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(
+            content, quality=level or settings.COMPRESS_BROTLI_QUALITY
+        )
+    return gzip.compress(
+        content, level or settings.COMPRESS_GZIP_LEVEL, mtime=0
+    )
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,129 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import quote_etag
+
+CATALOG = "catalog"
+
+
+def get_generations(*scopes):
+    """Счётчики изменений областей scopes одним обращением к кэшу.
+
+    Хранятся в кэше default, поэтому одинаковы во всех воркерах, только
+    если кэш общий (memcached)."""
+    keys = [f"generation:{scope}" for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, uuid4().hex, timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def get_generation(scope):
+    return get_generations(scope)[0]
+
+
+class PendingBumps:
+    """Области, изменённые в текущем блоке atomic: все счётчики
+    меняются одним set_many после фиксации. Отдельный объект на каждую
+    точку сохранения, чтобы её откат отменял только свои изменения."""
+
+    def __init__(self, scopes):
+        self.scopes = set(scopes)
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        cache.set_many(
+            {f"generation:{scope}": uuid4().hex for scope in self.scopes},
+            timeout=None,
+        )
+
+
+def bump_generation(*scopes):
+    """Меняет счётчики после фиксации транзакции: иначе параллельный
+    запрос успел бы закешировать старые данные под новым ETag.
+
+    Вместо инкремента записывается новое уникальное значение, поэтому
+    параллельные изменения не теряются и без атомарного incr."""
+    if not scopes:
+        return
+    connection = transaction.get_connection()
+    savepoints = set(connection.savepoint_ids)
+    pending = next(
+        (
+            callback[1]
+            for callback in connection.run_on_commit
+            if callback[0] == savepoints
+            and isinstance(callback[1], PendingBumps)
+            and not callback[1].done
+        ),
+        None,
+    )
+    if pending is None:
+        transaction.on_commit(PendingBumps(scopes))
+    else:
+        pending.scopes.update(scopes)
+
+
+def make_etag(*scopes):
+    generations = ":".join(
+        f"{scope}={generation}"
+        for scope, generation in zip(scopes, get_generations(*scopes))
+    )
+    return quote_etag(hashlib.md5(generations.encode()).hexdigest())
+
+
+def conditional_response(request, etag, handler, *args, **kwargs):
+    """Отвечает 304 без вызова handler, если у клиента актуальная версия."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = handler(request, *args, **kwargs)
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+    return response
+
+
+class CatalogConditionalMixin:
+    """ETag для справочников по счётчику изменений каталога."""
+
+    def get_catalog_etag(self):
+        return make_etag(CATALOG, self.basename)
+
+    def list(self, request, *args, **kwargs):
+        return self.catalog_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.catalog_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def catalog_response(self, handler, request, *args, **kwargs):
+        response = conditional_response(
+            request, self.get_catalog_etag(), handler, *args, **kwargs
+        )
+        patch_cache_control(
+            response, public=True, max_age=settings.CATALOG_MAX_AGE
+        )
+        return response
+
+
+def recipe_etag(recipe_id, author_id, user):
+    scopes = [CATALOG, f"recipe:{recipe_id}", f"user:{author_id}"]
+    if user.is_authenticated:
+        scopes.append(f"viewer:{user.pk}")
+    return make_etag(*scopes)
+
+
+def private_revalidate(response):
+    """Ответ зависит от пользователя: кэшировать только у клиента
+    и перепроверять каждый раз."""
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Authorization",))
+    return response
@@ -0,0 +1,116 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.files import save_protected
+from api.pdf import render_shopping_list
+from recipes.models import ExportJob
+from recipes.shopping import shopping_list
+
+exports = {}
+
+
+def register(export_class):
+    exports[export_class.name] = export_class()
+    return export_class
+
+
+class Export:
+    """Тип выгрузки.
+
+    payload собирается в запросе и определяет ключ дедупликации,
+    render выполняется в процессе воркера и не обращается к базе."""
+
+    name = None
+    directory = "exports"
+    extension = ""
+    filename = ""
+    content_type = "application/octet-stream"
+
+    def payload(self, user):
+        raise NotImplementedError
+
+    def render(self, payload):
+        raise NotImplementedError
+
+
+@register
+class ShoppingListExport(Export):
+    name = "shopping_list"
+    directory = "shopping_lists"
+    extension = ".pdf"
+    filename = "recipe.pdf"
+    content_type = "application/pdf"
+
+    def payload(self, user):
+        return {"rows": shopping_list(user)}
+
+    def render(self, payload):
+        return render_shopping_list(payload["rows"])
+
+
+def payload_key(payload):
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def enqueue(user, kind):
+    """Ставит выгрузку в очередь. Для неизменившихся данных возвращает
+    существующую задачу, упавшая задача ставится в очередь заново."""
+    payload = exports[kind].payload(user)
+    job, _ = ExportJob.objects.get_or_create(
+        user=user,
+        kind=kind,
+        key=payload_key(payload),
+        defaults={"payload": payload},
+    )
+    if job.status == ExportJob.FAILED:
+        ExportJob.objects.filter(pk=job.pk, status=ExportJob.FAILED).update(
+            status=ExportJob.PENDING, error=""
+        )
+        job.status = ExportJob.PENDING
+    return job
+
+
+def claim(limit):
+    """Забирает до limit задач из очереди. Задачи, зависшие в работе
+    дольше EXPORT_JOB_TIMEOUT, возвращаются в очередь."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ExportJob.PENDING)
+                | Q(status=ExportJob.RUNNING, started__lt=stale)
+            )
+            .order_by("id")[:limit]
+        )
+        ExportJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ExportJob.RUNNING, started=now, attempts=F("attempts") + 1
+        )
+    return jobs
+
+
+def render_job(kind, payload):
+    return exports[kind].render(payload)
+
+
+def complete(job, content):
+    export = exports[job.kind]
+    name = save_protected(export.directory, content, export.extension)
+    ExportJob.objects.filter(pk=job.pk).update(
+        status=ExportJob.DONE, file=name, finished=timezone.now()
+    )
+
+
+def fail(job, error):
+    ExportJob.objects.filter(pk=job.pk).update(
+        status=ExportJob.FAILED, error=repr(error), finished=timezone.now()
+    )
@@ -0,0 +1,38 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+
+
+def protected_name(directory, content, extension):
+    digest = hashlib.sha256(content).hexdigest()
+    return os.path.join(
+        settings.PROTECTED_MEDIA_DIR, directory, f"{digest}{extension}"
+    )
+
+
+def save_protected(directory, content, extension):
+    """Сохраняет сгенерированный файл в закрытый каталог media."""
+    name = protected_name(directory, content, extension)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def protected_response(name, filename, content_type):
+    """Отдаёт файл из закрытого каталога через X-Accel-Redirect nginx
+    или самим Django, если nginx не используется."""
+    if settings.USE_X_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.PROTECTED_MEDIA_URL + (
+            os.path.relpath(name, settings.PROTECTED_MEDIA_DIR)
+        )
+    else:
+        response = FileResponse(
+            default_storage.open(name), content_type=content_type
+        )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,7 +1,8 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe, Tag
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag
 
 
 class IngredientSearchFilter(SearchFilter):
@@ -11,12 +12,16 @@ class IngredientSearchFilter(SearchFilter):
 
 
 class RecipeFilter(FilterSet):
-    """Фильтрация по тегам, списка избранного и рецептов в корзине."""
+    """Фильтрация по тегам, списка избранного и рецептов в корзине.
+
+    Многозначные условия проверяются подзапросами EXISTS, а не JOIN,
+    поэтому рецепты не дублируются и DISTINCT не нужен."""
 
     tags = filters.ModelMultipleChoiceFilter(
         field_name="tags__slug",
         to_field_name="slug",
         queryset=Tag.objects.all(),
+        method="filter_tags",
     )
     is_favorited = filters.BooleanFilter(method="filter_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(
@@ -27,12 +32,34 @@ class RecipeFilter(FilterSet):
         model = Recipe
         fields = ("tags", "author", "is_favorited", "is_in_shopping_cart")
 
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef("pk"),
+                    tag_id__in=[tag.pk for tag in value],
+                )
+            )
+        )
+
+    def filter_by_user(self, queryset, model, value):
+        if not value:
+            return queryset
+        if not self.request.user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(
+            Exists(
+                model.objects.filter(
+                    recipe_id=OuterRef("pk"), user=self.request.user
+                )
+            )
+        )
+
     def filter_is_favorited(self, queryset, name, value):
-        if value:
-            return queryset.filter(favorites__user=self.request.user)
-        return queryset
+        return self.filter_by_user(queryset, Favorite, value)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        if value:
-            return queryset.filter(carts__user=self.request.user)
-        return queryset
+        return self.filter_by_user(queryset, ShoppingCart, value)
+
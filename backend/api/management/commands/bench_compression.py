@@ -0,0 +1,48 @@
+import hashlib
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.compression import brotli, compress
+from api.management.commands.bench_renderers import recipe_list_payload
+from api.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает размер и время сжатия списка рецептов разной длины "
+        "для gzip и brotli."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", default=[1, 6, 50, 500], nargs="+", type=int
+        )
+        parser.add_argument("--repeat", default=20, type=int)
+
+    def handle(self, *args, **options):
+        renderer = FastJSONRenderer()
+        codecs = [("gzip", level) for level in (1, 6, 9)]
+        if brotli is not None:
+            codecs += [("br", quality) for quality in (1, 5, 11)]
+        for rows in options["rows"]:
+            content = renderer.render(recipe_list_payload(rows))
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                hashlib.blake2b(content).hexdigest()
+            elapsed = (time.perf_counter() - started) / options["repeat"]
+            self.stdout.write(
+                f"{rows} строк: {len(content)} байт, ключ кэша "
+                f"{elapsed * 1e6:.0f} мкс"
+            )
+            for encoding, level in codecs:
+                started = time.perf_counter()
+                for _ in range(options["repeat"]):
+                    compressed = compress(content, encoding, level)
+                elapsed = (time.perf_counter() - started) / options["repeat"]
+                self.stdout.write(
+                    f"  {encoding}-{level}: {len(compressed)} байт "
+                    f"({len(compressed) / len(content):.0%}), "
+                    f"{elapsed * 1e6:.0f} мкс, "
+                    f"{len(content) / max(elapsed, 1e-9) / 2**20:.0f} МБ/с"
+                )
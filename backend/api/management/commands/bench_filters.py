@@ -0,0 +1,156 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django_filters.rest_framework import FilterSet, filters
+
+from api.filters import RecipeFilter
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag
+from users.models import CustomUser
+
+
+class JoinRecipeFilter(FilterSet):
+    """Прежняя реализация фильтров через JOIN и DISTINCT."""
+
+    tags = filters.ModelMultipleChoiceFilter(
+        field_name="tags__slug",
+        to_field_name="slug",
+        queryset=Tag.objects.all(),
+    )
+    is_favorited = filters.BooleanFilter(method="filter_is_favorited")
+    is_in_shopping_cart = filters.BooleanFilter(
+        method="filter_is_in_shopping_cart"
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ("tags", "author", "is_favorited", "is_in_shopping_cart")
+
+    def filter_is_favorited(self, queryset, name, value):
+        if value:
+            return queryset.filter(favorites__user=self.request.user)
+        return queryset
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        if value:
+            return queryset.filter(carts__user=self.request.user)
+        return queryset
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт рецепты во временной транзакции и сравнивает фильтрацию "
+        "списка через JOIN и через EXISTS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", default=100000, type=int)
+        parser.add_argument("--tags", default=8, type=int)
+        parser.add_argument("--page-size", default=6, type=int)
+        parser.add_argument("--repeat", default=5, type=int)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.populate(options)
+            cases = {
+                "2 тега": {"tags": ["bench-0", "bench-1"]},
+                "4 тега": {"tags": [f"bench-{i}" for i in range(4)]},
+                "теги + избранное": {
+                    "tags": ["bench-0", "bench-1"],
+                    "is_favorited": "1",
+                },
+                "теги + избранное + корзина": {
+                    "tags": ["bench-0", "bench-1", "bench-2"],
+                    "is_favorited": "1",
+                    "is_in_shopping_cart": "1",
+                },
+            }
+            for name, params in cases.items():
+                self.compare(name, params, user, options)
+            transaction.set_rollback(True)
+
+    def populate(self, options):
+        generator = random.Random(0)
+        user = CustomUser.objects.create(
+            email="bench-filters@example.com",
+            username="bench-filters",
+            first_name="bench",
+            last_name="bench",
+        )
+        Tag.objects.bulk_create(
+            Tag(name=f"bench {i}", slug=f"bench-{i}", color=f"#be{i:04x}")
+            for i in range(options["tags"])
+        )
+        tag_ids = list(
+            Tag.objects.filter(slug__startswith="bench-").values_list(
+                "id", flat=True
+            )
+        )
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author=user,
+                    name=f"Рецепт {i}",
+                    image="recipes/bench.png",
+                    text="",
+                    cooking_time=10,
+                )
+                for i in range(options["recipes"])
+            ),
+            batch_size=5000,
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(author=user).values_list("id", flat=True)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in generator.sample(
+                    tag_ids, generator.randint(1, 3)
+                )
+            ),
+            batch_size=5000,
+        )
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                (
+                    model(user=user, recipe_id=recipe_id)
+                    for recipe_id in generator.sample(
+                        recipe_ids, len(recipe_ids) // 10
+                    )
+                ),
+                batch_size=5000,
+            )
+        return user
+
+    def compare(self, name, params, user, options):
+        request = RequestFactory().get("/api/recipes/", params)
+        request.user = user
+        queryset = Recipe.objects.order_by("-pub_date")
+        results = {}
+        for label, filterset_class in (
+            ("join", JoinRecipeFilter),
+            ("exists", RecipeFilter),
+        ):
+            filtered = filterset_class(
+                request.GET, queryset=queryset, request=request
+            ).qs
+            ids = list(filtered.values_list("id", flat=True))
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                count = filtered.count()
+                list(filtered[: options["page_size"]])
+            elapsed = (time.perf_counter() - started) / options["repeat"]
+            results[label] = (sorted(ids), count, elapsed)
+        join_ids, join_count, join_time = results["join"]
+        exists_ids, exists_count, exists_time = results["exists"]
+        if join_ids != exists_ids or exists_count != len(exists_ids):
+            raise CommandError(f"{name}: результаты фильтров различаются")
+        self.stdout.write(
+            f"{name}: {exists_count} рецептов, "
+            f"join {join_time * 1000:.1f} мс, "
+            f"exists {exists_time * 1000:.1f} мс"
+        )
@@ -0,0 +1,96 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from api.renderers import FastJSONRenderer, orjson
+
+
+def recipe_list_payload(rows):
+    now = timezone.localtime()
+    author = {
+        "id": 1,
+        "email": "author@example.com",
+        "username": "author",
+        "first_name": "Имя",
+        "last_name": "Фамилия",
+        "is_subscribed": False,
+        "recipes": [
+            {
+                "id": number,
+                "name": f"Рецепт {number}",
+                "image": f"/media/recipes/{number}.png",
+                "cooking_time": 30,
+            }
+            for number in range(3)
+        ],
+        "recipes_count": 3,
+    }
+    return ReturnList(
+        [
+            {
+                "id": number,
+                "tags": [
+                    {
+                        "id": 1,
+                        "name": gettext_lazy("Завтрак"),
+                        "color": "#0000ff",
+                        "slug": "zavtrak",
+                    }
+                ],
+                "author": author,
+                "ingredients": [
+                    {
+                        "id": ingredient,
+                        "name": f"Ингредиент {ingredient}",
+                        "amount": Decimal("12.50"),
+                        "measurement_unit": "г",
+                    }
+                    for ingredient in range(8)
+                ],
+                "is_favorited": True,
+                "is_in_shopping_cart": False,
+                "name": f"Рецепт {number}",
+                "image": f"http://localhost/media/recipes/{number}.png",
+                "text": "Описание рецепта " * 20,
+                "cooking_time": 45,
+                "pub_date": now,
+            }
+            for number in range(rows)
+        ],
+        serializer=None,
+    )
+
+
+class Command(BaseCommand):
+    help = "Сравнивает JSONRenderer и FastJSONRenderer на списке рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default=1000, type=int)
+        parser.add_argument("--repeat", default=20, type=int)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson не установлен, сравнение бессмысленно")
+            return
+        payload = recipe_list_payload(options["rows"])
+        renderers = {"json": JSONRenderer(), "orjson": FastJSONRenderer()}
+        outputs = {
+            name: renderer.render(payload)
+            for name, renderer in renderers.items()
+        }
+        if outputs["json"] != outputs["orjson"]:
+            raise CommandError("Ответы рендереров различаются")
+        for name, renderer in renderers.items():
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                renderer.render(payload)
+            elapsed = (time.perf_counter() - started) / options["repeat"]
+            self.stdout.write(
+                f"{name}: {len(outputs[name]) / 1024:.0f} КБ, "
+                f"{elapsed * 1000:.2f} мс на ответ"
+            )
@@ -0,0 +1,75 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import (USER_FIELDS, serialize_recipes,
+                                  serialize_users)
+from api.serializers import CustomUserSerializer, RecipeListSerializer
+from recipes.models import Recipe
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает JSON быстрых и стандартных сериализаторов и замеряет "
+        "время на одну строку."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", default=500, type=int)
+        parser.add_argument("--repeat", default=5, type=int)
+        parser.add_argument("--recipes-limit", default=3, type=int)
+        parser.add_argument("--email", help="Почта просматривающего")
+
+    def handle(self, *args, **options):
+        request = Request(
+            APIRequestFactory().get(
+                "/api/", {"recipes_limit": options["recipes_limit"]}
+            )
+        )
+        request.user = AnonymousUser()
+        if options["email"]:
+            request.user = CustomUser.objects.get(email=options["email"])
+        recipes = Recipe.objects.order_by("-pub_date")[: options["limit"]]
+        users = CustomUser.objects.all()[: options["limit"]]
+        self.compare(
+            "recipes",
+            lambda: RecipeListSerializer(
+                list(recipes), many=True, context={"request": request}
+            ).data,
+            lambda: serialize_recipes(
+                list(recipes.values_list("id", flat=True)), request
+            ),
+            options,
+        )
+        self.compare(
+            "users",
+            lambda: CustomUserSerializer(
+                list(users), many=True, context={"request": request}
+            ).data,
+            lambda: serialize_users(users.values(*USER_FIELDS), request),
+            options,
+        )
+
+    def compare(self, name, slow, fast, options):
+        renderer = JSONRenderer()
+        fast_data = fast()
+        if renderer.render(slow()) != renderer.render(fast_data):
+            raise CommandError(f"{name}: ответы сериализаторов различаются")
+        rows = max(len(fast_data), 1)
+        results = {}
+        for label, build in (("drf", slow), ("fast", fast)):
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                renderer.render(build())
+            elapsed = time.perf_counter() - started
+            results[label] = elapsed / options["repeat"] / rows * 1e6
+        self.stdout.write(
+            f"{name}: {rows} строк, drf {results['drf']:.1f} мкс/строка, "
+            f"fast {results['fast']:.1f} мкс/строка, "
+            f"x{results['drf'] / max(results['fast'], 1e-9):.1f}"
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.bundles import build_bundles
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает сжатые снимки тегов и ингредиентов с хешем содержимого "
+        "в имени для раздачи через nginx."
+    )
+
+    def handle(self, *args, **options):
+        manifest = build_bundles()
+        for catalog, entry in manifest.items():
+            if catalog == "version":
+                continue
+            self.stdout.write(
+                f"{catalog}: {entry['url']} ({entry['size'] / 1024:.0f} КБ)"
+            )
+        self.stdout.write(f"Версия каталога: {manifest['version']}")
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+WORKER_SCRIPT = """
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import django
+
+django.setup()
+from app.wsgi import application
+imported = time.perf_counter()
+if {warmup}:
+    from api.warmup import warm_up
+
+    warm_up()
+warmed = time.perf_counter()
+from django.test import Client
+
+client = Client(SERVER_NAME="localhost")
+first = time.perf_counter()
+status = client.get({url!r}).status_code
+responded = time.perf_counter()
+client.get({url!r})
+second = time.perf_counter()
+print(json.dumps({{
+    "import": imported - started,
+    "warmup": warmed - imported,
+    "first": responded - first,
+    "second": second - responded,
+    "status": status,
+    "reportlab": "reportlab" in sys.modules,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает воркеры в отдельных процессах и измеряет время импорта "
+        "и первого ответа."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", default=3, type=int)
+        parser.add_argument("--url", default="/api/tags/")
+        parser.add_argument("--no-warmup", action="store_true")
+
+    def handle(self, *args, **options):
+        script = WORKER_SCRIPT.format(
+            warmup=not options["no_warmup"], url=options["url"]
+        )
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-c", script],
+                cwd=settings.BASE_DIR,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(options["workers"])
+        ]
+        for number, worker in enumerate(workers, 1):
+            stdout, stderr = worker.communicate()
+            if worker.returncode:
+                raise CommandError(stderr)
+            result = json.loads(stdout.splitlines()[-1])
+            self.stdout.write(
+                f"воркер {number}: импорт {result['import'] * 1000:.0f} мс, "
+                f"прогрев {result['warmup'] * 1000:.0f} мс, "
+                f"первый ответ {result['first'] * 1000:.1f} мс, "
+                f"второй {result['second'] * 1000:.1f} мс, "
+                f"статус {result['status']}, "
+                f"reportlab {'загружен' if result['reportlab'] else 'нет'}"
+            )
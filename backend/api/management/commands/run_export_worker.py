@@ -0,0 +1,58 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.bundles import refresh_bundles
+from api.exports import claim, complete, fail, render_job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет задачи выгрузки из очереди в пуле процессов. "
+        "Рендеринг идёт в дочерних процессах, запись в базу — в основном. "
+        "Между задачами пересобирает бандлы справочников."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int)
+        parser.add_argument("--poll-interval", type=float)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Завершиться, когда очередь опустеет",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"] or settings.EXPORT_CONCURRENCY
+        interval = options["poll_interval"] or settings.EXPORT_POLL_INTERVAL
+        running = {}
+        processed = 0
+        with ProcessPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                refresh_bundles()
+                if len(running) < concurrency:
+                    for job in claim(concurrency - len(running)):
+                        future = pool.submit(render_job, job.kind, job.payload)
+                        running[future] = job
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(interval)
+                    continue
+                done, _ = wait(
+                    running, timeout=interval, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        complete(job, future.result())
+                    except Exception as error:
+                        logger.exception("Выгрузка %s не удалась", job)
+                        fail(job, error)
+                    processed += 1
+        self.stdout.write(f"Выполнено выгрузок: {processed}")
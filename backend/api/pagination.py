@@ -1,5 +1,29 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size_query_param = "limit"
+
+
+class EstimatedCountPaginator(Paginator):
+    """Для больших таблиц без фильтров берёт оценку числа строк
+    из статистики PostgreSQL вместо COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= settings.ADMIN_ESTIMATE_FROM:
+                return int(row[0])
+        return super().count
@@ -0,0 +1,43 @@
+import os
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+
+FONT_NAME = "Comic Sans MS"
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    """Импортирует ReportLab и регистрирует шрифт при первом вызове,
+    а не при запуске каждого воркера."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(
+        TTFont(
+            FONT_NAME,
+            os.path.join(settings.BASE_DIR, "data", f"{FONT_NAME}.ttf"),
+            "UTF-8",
+        )
+    )
+
+
+def render_shopping_list(data):
+    """PDF со списком покупок из строк (название, количество, единицы)."""
+    from reportlab.pdfgen import canvas
+
+    register_font()
+    buffer = BytesIO()
+    page = canvas.Canvas(buffer, invariant=True)
+    page.setFont(FONT_NAME, size=24)
+    page.drawString(200, 800, "список покупок")
+    page.setFont(FONT_NAME, size=16)
+    page.drawString(75, 750, "Ингредиенты:")
+    height = 700
+    for i, (name, amount, unit) in enumerate(data, 1):
+        page.drawString(75, height, f"{i}. {name} - {amount} {unit}")
+        height -= 25
+    page.showPage()
+    page.save()
+    return buffer.getvalue()
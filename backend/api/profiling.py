@@ -0,0 +1,123 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "profile"
+EXTENSION = ".folded"
+ROTATED = ".1"
+
+write_lock = threading.Lock()
+
+
+def collapse(frame, root):
+    """Стек от root до frame в формате collapsed stacks."""
+    names = []
+    while frame is not None and frame is not root:
+        names.append(
+            f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    """Поток, который раз в interval секунд снимает стек потока запроса."""
+
+    def __init__(self, root, interval=None):
+        super().__init__(daemon=True)
+        self.thread_id = threading.get_ident()
+        self.root = root
+        self.interval = interval or settings.PROFILE_INTERVAL
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame, self.root)] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+def profile_name(view_name):
+    return re.sub(r"[^\w.-]", "_", view_name or "unresolved")
+
+
+def profile_path(name):
+    return os.path.join(settings.PROFILE_DIR, profile_name(name) + EXTENSION)
+
+
+def format_stacks(stacks):
+    return "".join(
+        f"{stack} {count}\n" for stack, count in stacks.items() if stack
+    )
+
+
+def read_stacks(path):
+    stacks = Counter()
+    with open(path) as file:
+        for line in file:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            stacks[stack] += int(count)
+    return stacks
+
+
+def save_stacks(view_name, stacks):
+    """Дописывает сэмплы запроса в файл представления.
+
+    Файл больше PROFILE_MAX_SIZE сворачивается: одинаковые стеки
+    складываются в одну строку. Если и свёрнутый файл больше половины
+    предела, он становится файлом .1 вместо прежнего, и запись
+    начинается заново: на представление не больше двух файлов."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    path = profile_path(view_name)
+    with write_lock:
+        with open(path, "a") as file:
+            file.write(format_stacks(stacks))
+        if os.path.getsize(path) > settings.PROFILE_MAX_SIZE:
+            compact(path)
+
+
+def compact(path):
+    content = format_stacks(read_stacks(path)).encode()
+    if len(content) > settings.PROFILE_MAX_SIZE // 2:
+        os.replace(path, path + ROTATED)
+        return
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(content)
+    os.replace(temporary, path)
+
+
+def load_stacks(name):
+    """Сэмплы представления, сложенные по одинаковым стекам."""
+    return read_stacks(profile_path(name))
+
+
+def delete_profile(name):
+    os.remove(profile_path(name))
+    try:
+        os.remove(profile_path(name) + ROTATED)
+    except FileNotFoundError:
+        pass
+
+
+def list_profiles():
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return {}
+    return {
+        name[: -len(EXTENSION)]: sum(
+            load_stacks(name[: -len(EXTENSION)]).values()
+        )
+        for name in sorted(os.listdir(settings.PROFILE_DIR))
+        if name.endswith(EXTENSION)
+    }
@@ -0,0 +1,51 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson
+    else 0
+)
+
+# Числа, которые orjson записывает не так, как json: с порядком (1e16
+# вместо 1e+16) и меньше 1e-4 (0.00001 вместо 1e-05). Совпадение внутри
+# строки только вернёт ответ к JSONRenderer.
+FLOAT_MISMATCH = re.compile(rb"[:,\[]-?(?:\d+(?:\.\d+)?e|0\.0000)")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson, если он установлен.
+
+    Даты, Decimal и ленивые строки по-прежнему преобразует кодировщик DRF,
+    а ответы с числами, которые orjson пишет иначе, рендерит JSONRenderer,
+    поэтому байты совпадают. Осознанное отличие: NaN и бесконечность
+    записываются как null, а JSONRenderer на них падает с ValueError."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        if FLOAT_MISMATCH.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -1,18 +1,65 @@
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.urls import reverse
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
-from rest_framework.fields import (IntegerField, ReadOnlyField,
-                                   SerializerMethodField)
+from rest_framework.fields import (ChoiceField, IntegerField, ListField,
+                                   ReadOnlyField, SerializerMethodField)
 from rest_framework.relations import PrimaryKeyRelatedField
-from rest_framework.serializers import ModelSerializer
-
-from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                            ShoppingCart, Tag)
+from rest_framework.serializers import (ListSerializer, ModelSerializer,
+                                        Serializer)
+
+from api.exports import exports
+from api.sparse import parse_selection
+from recipes.cards import deferred_refresh, mark_stale
+from recipes.models import (Event, ExportJob, Favorite, Ingredient,
+                            IngredientAmount, Recipe, ShoppingCart, Tag)
+from recipes.nutrition import recipe_totals
+from recipes.outbox import record_many
 from users.models import CustomUser, Follow
 
 
-class CustomUserSerializer(UserSerializer):
+def by_pk(manager):
+    """Связанные объекты по возрастанию id, в том числе из prefetch."""
+    return sorted(manager.all(), key=attrgetter("pk"))
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе только поля из ?fields=.
+
+    Применяется лишь к сериализатору верхнего уровня; вложенные объекты,
+    не указанные в ?expand=, заменяются полями из collapsed_fields."""
+
+    collapsed_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        selection = parse_selection(self.context.get("request"))
+        if selection is None:
+            return fields
+        selected, expand = selection
+        for name in list(fields):
+            if name not in selected:
+                del fields[name]
+            elif name in self.collapsed_fields and name not in expand:
+                fields[name] = self.collapsed_fields[name]()
+        return fields
+
+
+class CustomUserSerializer(SparseFieldsMixin, UserSerializer):
+    collapsed_fields = {
+        "recipes": lambda: SerializerMethodField(method_name="get_recipe_ids")
+    }
+
     is_subscribed = SerializerMethodField(read_only=True)
     recipes = SerializerMethodField(read_only=True)
     recipes_count = SerializerMethodField(read_only=True)
@@ -39,12 +86,15 @@ class CustomUserSerializer(UserSerializer):
 
     def get_recipes(self, obj):
         request = self.context.get("request")
-        recipes = obj.recipes.all()
+        recipes = obj.recipes.order_by("pk")
         recipes_limit = request.query_params.get("recipes_limit")
         if recipes_limit:
             recipes = recipes[: int(recipes_limit)]
         return ShortRecipeSerializer(recipes, many=True).data
 
+    def get_recipe_ids(self, obj):
+        return [recipe["id"] for recipe in self.get_recipes(obj)]
+
     @staticmethod
     def get_recipes_count(obj):
         return obj.recipes.count()
@@ -60,7 +110,7 @@ class TagSerializer(ModelSerializer):
 class IngredientSerializer(ModelSerializer):
     class Meta:
         model = Ingredient
-        fields = "__all__"
+        fields = ("id", "name", "measurement_unit")
         read_only_fields = ("__all__",)
 
 
@@ -74,22 +124,44 @@ class IngredientAmountSerializer(ModelSerializer):
         fields = ("id", "name", "amount", "measurement_unit")
 
 
-class RecipeListSerializer(ModelSerializer):
-    tags = TagSerializer(many=True, read_only=True)
+class RecipeListSerializer(SparseFieldsMixin, ModelSerializer):
+    """Тэги и ингредиенты отдаются по возрастанию id, как в карточках
+    быстрого сериализатора."""
+
+    collapsed_fields = {
+        "author": lambda: PrimaryKeyRelatedField(read_only=True),
+        "tags": lambda: SerializerMethodField(method_name="get_tag_ids"),
+        "ingredients": lambda: SerializerMethodField(
+            method_name="get_ingredient_ids"
+        ),
+    }
+
+    tags = SerializerMethodField(read_only=True)
     author = CustomUserSerializer(read_only=True)
     ingredients = SerializerMethodField(read_only=True)
     is_favorited = SerializerMethodField(read_only=True)
     is_in_shopping_cart = SerializerMethodField(read_only=True)
+    totals = SerializerMethodField(read_only=True)
 
     class Meta:
         model = Recipe
         fields = "__all__"
 
+    @staticmethod
+    def get_tags(obj):
+        return TagSerializer(by_pk(obj.tags), many=True).data
+
+    @staticmethod
+    def get_tag_ids(obj):
+        return [tag.pk for tag in by_pk(obj.tags)]
+
     @staticmethod
     def get_ingredients(obj):
-        return IngredientAmountSerializer(
-            IngredientAmount.objects.filter(recipe=obj), many=True
-        ).data
+        return IngredientAmountSerializer(by_pk(obj.amounts), many=True).data
+
+    @staticmethod
+    def get_ingredient_ids(obj):
+        return [amount.ingredient_id for amount in by_pk(obj.amounts)]
 
     def get_is_favorited(self, obj):
         request = self.context.get("request")
@@ -105,6 +177,12 @@ class RecipeListSerializer(ModelSerializer):
                 user=request.user, recipe=obj
             ).exists()
 
+    def get_totals(self, obj):
+        totals = self.context.get("totals")
+        if totals is None or obj.pk not in totals:
+            totals = recipe_totals([obj.pk])
+        return totals[obj.pk]
+
 
 class AddIngredientSerializer(ModelSerializer):
     id = PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
@@ -178,20 +256,26 @@ class RecipeSerializer(ModelSerializer):
             )
             for ingredient in ingredients
         ]
-        IngredientAmount.objects.bulk_create(data_to_create)
+        record_many(
+            IngredientAmount.objects.bulk_create(data_to_create),
+            Event.CREATED,
+        )
+        mark_stale((recipe.pk,))
 
     @staticmethod
     def create_tags(tags, recipe):
         for tag in tags:
             recipe.tags.add(tag)
 
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context.get("request").user
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
-        recipe = Recipe.objects.create(author=author, **validated_data)
-        self.create_tags(tags, recipe)
-        self.create_ingredients(ingredients, recipe)
+        with deferred_refresh():
+            recipe = Recipe.objects.create(author=author, **validated_data)
+            self.create_tags(tags, recipe)
+            self.create_ingredients(ingredients, recipe)
         return recipe
 
     def to_representation(self, instance):
@@ -199,12 +283,16 @@ class RecipeSerializer(ModelSerializer):
         context = {"request": request}
         return RecipeListSerializer(instance, context=context).data
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        IngredientAmount.objects.filter(recipe=instance).delete()
-        self.create_tags(validated_data.pop("tags"), instance)
-        self.create_ingredients(validated_data.pop("ingredients"), instance)
-        return super().update(instance, validated_data)
+        with deferred_refresh():
+            instance.tags.clear()
+            IngredientAmount.objects.filter(recipe=instance).delete()
+            self.create_tags(validated_data.pop("tags"), instance)
+            self.create_ingredients(
+                validated_data.pop("ingredients"), instance
+            )
+            return super().update(instance, validated_data)
 
 
 class ShortRecipeSerializer(ModelSerializer):
@@ -213,7 +301,45 @@ class ShortRecipeSerializer(ModelSerializer):
         fields = ("id", "name", "image", "cooking_time")
 
 
-class FavoriteSerializer(ModelSerializer):
+class UniqueLinkSerializer(ModelSerializer):
+    """Уникальность связи проверяет ограничение базы, а не запрос exists.
+
+    В ошибку duplicate_error превращается только нарушение ограничения
+    unique_constraint, остальные IntegrityError пробрасываются."""
+
+    duplicate_error = None
+    unique_constraint = None
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as error:
+            if self.is_duplicate(error, validated_data):
+                raise ValidationError(self.duplicate_error)
+            raise
+
+    def is_duplicate(self, error, validated_data):
+        """PostgreSQL называет нарушенное ограничение в ошибке, для
+        остальных баз проверяется, есть ли уже такая связь."""
+        diag = getattr(error.__cause__, "diag", None)
+        if diag is not None and diag.constraint_name:
+            return diag.constraint_name == self.unique_constraint
+        model = self.Meta.model
+        constraint = next(
+            constraint
+            for constraint in model._meta.constraints
+            if constraint.name == self.unique_constraint
+        )
+        return model.objects.filter(
+            **{field: validated_data[field] for field in constraint.fields}
+        ).exists()
+
+
+class FavoriteSerializer(UniqueLinkSerializer):
+    duplicate_error = {"status": "Рецепт уже есть в избранном!"}
+    unique_constraint = "favorite_unique"
+
     class Meta:
         model = Favorite
         fields = ("user", "recipe")
@@ -222,9 +348,6 @@ class FavoriteSerializer(ModelSerializer):
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
-        recipe = data["recipe"]
-        if Favorite.objects.filter(user=request.user, recipe=recipe).exists():
-            raise ValidationError({"status": "Рецепт уже есть в избранном!"})
         return data
 
     def to_representation(self, instance):
@@ -233,7 +356,10 @@ class FavoriteSerializer(ModelSerializer):
         return ShortRecipeSerializer(instance.recipe, context=context).data
 
 
-class ShoppingCartSerializer(ModelSerializer):
+class ShoppingCartSerializer(UniqueLinkSerializer):
+    duplicate_error = {"status": "Рецепт уже есть в корзине!"}
+    unique_constraint = "shopping_cart_unique"
+
     class Meta:
         model = ShoppingCart
         fields = ("user", "recipe")
@@ -242,11 +368,6 @@ class ShoppingCartSerializer(ModelSerializer):
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
-        recipe = data["recipe"]
-        if ShoppingCart.objects.filter(
-            user=request.user, recipe=recipe
-        ).exists():
-            raise ValidationError({"status": "Рецепт уже есть в корзине!"})
         return data
 
     def to_representation(self, instance):
@@ -255,23 +376,65 @@ class ShoppingCartSerializer(ModelSerializer):
         return ShortRecipeSerializer(instance.recipe, context=context).data
 
 
-class FollowSerializer(ModelSerializer):
+class FollowSerializer(UniqueLinkSerializer):
+    duplicate_error = "Вы уже подписаны на этого пользователя!"
+    unique_constraint = "Подписка уже существует!"
+
     class Meta:
         model = Follow
         fields = "__all__"
         read_only_fields = ("__all__",)
 
     def validate(self, data):
-        author = self.instance
         user = self.context.get("request").user
-        if user == author:
+        if user == data["author"]:
             raise ValidationError(
                 detail="Нельзя подписаться на себя",
                 code=status.HTTP_400_BAD_REQUEST,
             )
-        if Follow.objects.filter(user=user, author=author).exists():
-            raise ValidationError(
-                detail="Вы уже подписаны на этого пользователя!",
-                code=status.HTTP_400_BAD_REQUEST,
-            )
         return data
+
+
+class BulkIdsSerializer(Serializer):
+    ids = ListField(
+        child=IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_LIMIT,
+    )
+
+    @staticmethod
+    def validate_ids(value):
+        return list(dict.fromkeys(value))
+
+
+class ExportRequestSerializer(Serializer):
+    kind = ChoiceField(choices=tuple(exports))
+
+
+class ExportJobSerializer(ModelSerializer):
+    url = SerializerMethodField()
+    download = SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "created",
+            "finished",
+            "url",
+            "download",
+        )
+
+    def get_url(self, obj):
+        return self.context["request"].build_absolute_uri(
+            reverse("export", args=(obj.pk,))
+        )
+
+    def get_download(self, obj):
+        if obj.status != ExportJob.DONE:
+            return None
+        return self.context["request"].build_absolute_uri(
+            reverse("export_download", args=(obj.pk,))
+        )
@@ -0,0 +1,69 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import evict_user, token_cache
+from api.conditional import CATALOG, bump_generation
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from users.models import CustomUser, Follow
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.evict_key(instance.key)
+    evict_user(instance.user_id)
+
+
+@receiver(user_logged_out)
+def evict_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        evict_user(user.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def evict_changed_user(sender, instance, **kwargs):
+    evict_user(instance.pk)
+    bump_generation(f"user:{instance.pk}")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_catalog(sender, **kwargs):
+    bump_generation(CATALOG)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def bump_recipe(sender, instance, **kwargs):
+    bump_generation(f"recipe:{instance.pk}", f"user:{instance.author_id}")
+
+
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def bump_recipe_ingredients(sender, instance, **kwargs):
+    bump_generation(f"recipe:{instance.recipe_id}")
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipe_tags(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, Recipe):
+        bump_generation(f"recipe:{instance.pk}")
+    else:
+        bump_generation(*(f"recipe:{pk}" for pk in pk_set or ()))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_viewer(sender, instance, **kwargs):
+    bump_generation(f"viewer:{instance.user_id}")
@@ -0,0 +1,71 @@
+from django.db.models import Prefetch
+
+from recipes.models import IngredientAmount, Tag
+
+RECIPE_COLUMNS = ("name", "image", "text", "cooking_time", "pub_date")
+USER_COLUMNS = ("email", "username", "first_name", "last_name")
+
+
+def split(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def parse_selection(request):
+    """Выбор полей из ?fields= и ?expand=.
+
+    Без fields возвращает None - ответ как раньше, целиком. С fields
+    в ответе остаются только перечисленные поля, а вложенные объекты
+    из fields отдаются идентификаторами, если они не указаны в expand."""
+    if request is None or not request.query_params.get("fields"):
+        return None
+    return (
+        split(request.query_params["fields"]),
+        split(request.query_params.get("expand", "")),
+    )
+
+
+def recipe_queryset(queryset, selection):
+    """Загружает только выбранные колонки и связи рецептов."""
+    if selection is None:
+        return queryset.select_related("author").prefetch_related(
+            "tags",
+            Prefetch(
+                "amounts",
+                queryset=IngredientAmount.objects.select_related(
+                    "ingredient"
+                ).order_by("pk"),
+            ),
+        )
+    fields, expand = selection
+    columns = [column for column in RECIPE_COLUMNS if column in fields]
+    if "author" in fields:
+        columns.append("author")
+        if "author" in expand:
+            queryset = queryset.select_related("author")
+            columns.extend(f"author__{column}" for column in USER_COLUMNS)
+    if "tags" in fields:
+        queryset = queryset.prefetch_related(
+            "tags"
+            if "tags" in expand
+            else Prefetch("tags", queryset=Tag.objects.only("id"))
+        )
+    if "ingredients" in fields:
+        amounts = IngredientAmount.objects.order_by("pk")
+        if "ingredients" in expand:
+            amounts = amounts.select_related("ingredient")
+        else:
+            amounts = amounts.only("recipe_id", "ingredient_id")
+        queryset = queryset.prefetch_related(
+            Prefetch("amounts", queryset=amounts)
+        )
+    return queryset.only("id", *columns)
+
+
+def user_queryset(queryset, selection):
+    """Загружает только выбранные колонки пользователей."""
+    if selection is None:
+        return queryset
+    fields, _ = selection
+    return queryset.only(
+        "id", *(column for column in USER_COLUMNS if column in fields)
+    )
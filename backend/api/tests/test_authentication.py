@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import (CachedTokenAuthentication, auth_scope,
+                                token_cache)
+from recipes.tests.factories import make_user
+from users.models import CustomUser
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = make_user(first_name="Старое")
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self):
+        user, _ = self.authentication.authenticate_credentials(self.token.key)
+        return user
+
+    def test_entry_is_reused_while_generation_is_unchanged(self):
+        self.authenticate()
+        CustomUser.objects.filter(pk=self.user.pk).update(first_name="Новое")
+        self.assertEqual(self.authenticate().first_name, "Старое")
+
+    def test_generation_bumped_elsewhere_invalidates_entry(self):
+        self.authenticate()
+        CustomUser.objects.filter(pk=self.user.pk).update(first_name="Новое")
+        # Другой воркер сменил поколение в общем кэше.
+        cache.set(f"generation:{auth_scope(self.user.pk)}", "other")
+        self.assertEqual(self.authenticate().first_name, "Новое")
+
+    def test_user_save_invalidates_entry(self):
+        self.authenticate()
+        CustomUser.objects.filter(pk=self.user.pk).update(first_name="Новое")
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.get(pk=self.user.pk).save()
+        self.assertEqual(self.authenticate().first_name, "Новое")
+
+    def test_deleted_token_is_rejected(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_change_during_load_is_not_cached(self):
+        load = TokenAuthentication.authenticate_credentials
+
+        def load_then_change(authentication, key):
+            credentials = load(authentication, key)
+            # Пароль сменили после чтения пользователя из базы.
+            cache.set(f"generation:{auth_scope(self.user.pk)}", "changed")
+            return credentials
+
+        with mock.patch.object(
+            TokenAuthentication, "authenticate_credentials", load_then_change
+        ):
+            self.authenticate()
+        CustomUser.objects.filter(pk=self.user.pk).update(first_name="Новое")
+        self.assertEqual(self.authenticate().first_name, "Новое")
+
+    def test_requests_get_own_copy_of_user(self):
+        first = self.authenticate()
+        first.first_name = "Изменено в запросе"
+        user, token = self.authentication.authenticate_credentials(
+            self.token.key
+        )
+        self.assertEqual(user.first_name, "Старое")
+        self.assertIsNot(user, first)
+        self.assertIs(token.user, user)
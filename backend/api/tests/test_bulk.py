@@ -0,0 +1,82 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.bulk import (CREATED, DELETED, EXISTS, NOT_FOUND, add_links,
+                      remove_links)
+from recipes.models import Event, Favorite, Recipe
+from recipes.tests.factories import make_recipe, make_user
+
+
+class BulkLinksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        author = make_user()
+        cls.recipes = [make_recipe(author) for _ in range(12)]
+        cls.ids = [recipe.pk for recipe in cls.recipes]
+
+    def events(self, action):
+        return Event.objects.filter(model="favorite", action=action)
+
+    def add(self, ids):
+        return add_links(self.user, ids, Favorite, "recipe_id", Recipe)
+
+    def test_add_links_statuses_and_events(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        self.events(Event.CREATED).delete()
+        missing = max(self.ids) + 1
+        result = self.add(self.ids[:3] + [missing])
+        self.assertEqual(
+            [row["status"] for row in result],
+            [EXISTS, CREATED, CREATED, NOT_FOUND],
+        )
+        favorites = dict(
+            Favorite.objects.filter(user=self.user).values_list(
+                "recipe_id", "pk"
+            )
+        )
+        self.assertEqual(
+            sorted(
+                (event.object_id, event.payload["recipe"])
+                for event in self.events(Event.CREATED)
+            ),
+            sorted((favorites[pk], pk) for pk in self.ids[1:3]),
+        )
+
+    def test_remove_links_statuses_and_events(self):
+        self.add(self.ids[:2])
+        favorites = set(
+            Favorite.objects.filter(user=self.user).values_list(
+                "pk", flat=True
+            )
+        )
+        result = remove_links(
+            self.user, [self.ids[0], self.ids[5]], Favorite, "recipe_id"
+        )
+        self.assertEqual(
+            [row["status"] for row in result], [DELETED, NOT_FOUND]
+        )
+        self.assertEqual(
+            Favorite.objects.filter(user=self.user).count(), 1
+        )
+        deleted = list(self.events(Event.DELETED))
+        self.assertEqual(len(deleted), 1)
+        self.assertIn(deleted[0].object_id, favorites)
+        self.assertEqual(deleted[0].payload["recipe"], self.ids[0])
+
+    def count_queries(self, function, ids):
+        with CaptureQueriesContext(connection) as queries:
+            function(ids)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        def remove(ids):
+            remove_links(self.user, ids, Favorite, "recipe_id")
+
+        small = self.count_queries(self.add, self.ids[:2])
+        large = self.count_queries(self.add, self.ids[2:])
+        self.assertEqual(small, large)
+        small = self.count_queries(remove, self.ids[:2])
+        large = self.count_queries(remove, self.ids[2:])
+        self.assertEqual(small, large)
@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api import bundles
+from api.bundles import build_bundles, bundle_dir, refresh_bundles
+from api.renderers import FastJSONRenderer
+from api.serializers import TagSerializer
+from recipes.models import Tag
+from recipes.tests.factories import make_ingredient, make_tag
+
+
+class CatalogBundleTests(APITestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overridden = override_settings(MEDIA_ROOT=media)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        bundles.built.clear()
+        bundles.manifest_cache.clear()
+        cache.clear()
+        # Поколение каталога меняется сразу, а не вместе с изменениями
+        # из теста.
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tag(name="Завтрак")
+            make_ingredient(name="Мука")
+
+    def files(self):
+        return sorted(os.listdir(bundle_dir()))
+
+    def read(self, name):
+        with open(os.path.join(bundle_dir(), name), "rb") as file:
+            return file.read()
+
+    def test_bundle_holds_serialized_catalog(self):
+        manifest = build_bundles()
+        name = os.path.basename(manifest["tags"]["url"])
+        content = FastJSONRenderer().render(
+            TagSerializer(Tag.objects.all(), many=True).data
+        )
+        self.assertEqual(self.read(name), content)
+        self.assertEqual(gzip.decompress(self.read(f"{name}.gz")), content)
+        self.assertEqual(manifest["tags"]["size"], len(content))
+        self.assertEqual(json.loads(self.read(bundles.MANIFEST)), manifest)
+
+    def test_only_json_and_gzip_files_are_written(self):
+        build_bundles()
+        self.assertEqual(
+            {os.path.splitext(name)[1] for name in self.files()},
+            {".json", ".gz"},
+        )
+
+    def test_unchanged_catalog_keeps_version(self):
+        first = build_bundles()
+        self.assertEqual(build_bundles(), first)
+        self.assertEqual(len(self.files()), 5)
+
+    @override_settings(CATALOG_BUNDLE_KEEP=0)
+    def test_changed_catalog_gets_new_version_and_prunes_old(self):
+        first = build_bundles()
+        make_tag(name="Ужин")
+        second = build_bundles()
+        self.assertNotEqual(
+            second["tags"]["version"], first["tags"]["version"]
+        )
+        self.assertEqual(
+            second["ingredients"]["version"],
+            first["ingredients"]["version"],
+        )
+        self.assertNotIn(os.path.basename(first["tags"]["url"]), self.files())
+
+    def test_catalog_write_does_not_build_bundles(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tag(name="Ужин")
+        self.assertFalse(os.path.exists(bundle_dir()))
+
+    def test_refresh_rebuilds_after_catalog_change(self):
+        self.assertTrue(refresh_bundles())
+        self.assertFalse(refresh_bundles())
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tag(name="Ужин")
+        self.assertTrue(refresh_bundles())
+        self.assertEqual(
+            self.client.get("/api/catalog/").data["tags"],
+            bundles.current_manifest()["tags"],
+        )
+
+    def test_export_worker_builds_bundles(self):
+        call_command(
+            "run_export_worker", once=True, concurrency=1, stdout=StringIO()
+        )
+        response = self.client.get("/api/tags/")
+        self.assertEqual(
+            response["X-Catalog-Bundle"],
+            bundles.current_manifest()["tags"]["url"],
+        )
@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.test import TestCase
+
+from api.conditional import bump_generation, get_generation
+
+
+class GenerationTests(TestCase):
+    def test_bump_waits_for_commit(self):
+        before = get_generation("recipe:1")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            bump_generation("recipe:1", "user:1")
+            self.assertEqual(get_generation("recipe:1"), before)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_generation("recipe:1"), before)
+
+    def test_rolled_back_bump_is_dropped(self):
+        before = get_generation("recipe:2")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    bump_generation("recipe:2")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_generation("recipe:2"), before)
+
+    def test_every_bump_gives_new_generation(self):
+        seen = {get_generation("catalog")}
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                bump_generation("catalog")
+            seen.add(get_generation("catalog"))
+        self.assertEqual(len(seen), 4)
+
+    def test_bumps_in_one_transaction_are_batched(self):
+        before = get_generation("recipe:3")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                bump_generation("recipe:3")
+                bump_generation("user:3", "recipe:3")
+                bump_generation("viewer:3")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            callbacks[0].scopes, {"recipe:3", "user:3", "viewer:3"}
+        )
+        self.assertNotEqual(get_generation("recipe:3"), before)
+
+    def test_rolled_back_savepoint_drops_only_its_bumps(self):
+        before = {scope: get_generation(scope) for scope in ("a", "b")}
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                bump_generation("a")
+                try:
+                    with transaction.atomic():
+                        bump_generation("b")
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        self.assertNotEqual(get_generation("a"), before["a"])
+        self.assertEqual(get_generation("b"), before["b"])
@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from recipes.models import ExportJob, ShoppingCart
+from recipes.tests.factories import (make_ingredient, make_recipe, make_tag,
+                                     make_user)
+
+URL = "/api/recipes/download_shopping_cart/"
+
+
+class DownloadShoppingCartTests(APITestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overridden = override_settings(
+            MEDIA_ROOT=media, USE_X_ACCEL_REDIRECT=0
+        )
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        self.user = make_user()
+        recipe = make_recipe(
+            make_user(),
+            tags=(make_tag(),),
+            ingredients=((make_ingredient(), 200),),
+        )
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        self.client.force_authenticate(self.user)
+
+    def test_queued_export_returns_status_immediately(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 202)
+        job = ExportJob.objects.get(user=self.user)
+        self.assertEqual(response.data["id"], job.pk)
+        self.assertEqual(response.data["status"], ExportJob.PENDING)
+        self.assertIsNone(response.data["download"])
+        self.assertTrue(
+            response.data["url"].endswith(f"/api/exports/{job.pk}/")
+        )
+        self.assertEqual(response["Location"], response.data["url"])
+        status = self.client.get(f"/api/exports/{job.pk}/")
+        self.assertEqual(status.data["status"], ExportJob.PENDING)
+
+    def test_repeated_request_reuses_job(self):
+        self.client.get(URL)
+        self.client.get(URL)
+        self.assertEqual(ExportJob.objects.filter(user=self.user).count(), 1)
+
+    def test_ready_export_returns_file(self):
+        self.client.get(URL)
+        call_command(
+            "run_export_worker", once=True, concurrency=1, stdout=StringIO()
+        )
+        job = ExportJob.objects.get(user=self.user)
+        self.assertEqual(job.status, ExportJob.DONE, job.error)
+        status = self.client.get(f"/api/exports/{job.pk}/")
+        self.assertTrue(
+            status.data["download"].endswith(
+                f"/api/exports/{job.pk}/download/"
+            )
+        )
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.startswith(b"%PDF"))
+        download = self.client.get(f"/api/exports/{job.pk}/download/")
+        self.assertEqual(download.status_code, 200)
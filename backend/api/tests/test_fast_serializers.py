@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import (USER_FIELDS, serialize_recipes,
+                                  serialize_users)
+from api.serializers import CustomUserSerializer, RecipeListSerializer
+from api.sparse import recipe_queryset
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.tests.factories import (make_ingredient, make_recipe, make_tag,
+                                     make_user)
+from users.models import CustomUser, Follow
+
+
+class FastSerializerTests(TestCase):
+    """Быстрые сериализаторы отдают тот же JSON, что и DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user()
+        authors = [make_user() for _ in range(3)]
+        tags = [make_tag() for _ in range(4)]
+        ingredients = [make_ingredient() for _ in range(4)]
+        for number in range(8):
+            author = authors[number % len(authors)]
+            recipe = make_recipe(
+                author,
+                # Тэги и ингредиенты добавляются не по порядку id.
+                tags=(tags[(number + 2) % 4], tags[number % 4]),
+                ingredients=(
+                    (ingredients[(number + 1) % 4], number + 1),
+                    (ingredients[number % 4], 10),
+                ),
+            )
+            if number % 2:
+                Favorite.objects.create(user=cls.viewer, recipe=recipe)
+            if number % 3:
+                ShoppingCart.objects.create(user=cls.viewer, recipe=recipe)
+        Follow.objects.create(user=cls.viewer, author=authors[0])
+
+    def request(self, user):
+        request = Request(
+            APIRequestFactory().get("/api/", {"recipes_limit": 2})
+        )
+        request.user = user
+        return request
+
+    def assertSameJSON(self, slow, fast):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(fast), renderer.render(slow))
+
+    def check_viewer(self, user):
+        request = self.request(user)
+        queryset = Recipe.objects.order_by("-pub_date")
+        fast = serialize_recipes(
+            list(queryset.values_list("id", flat=True)), request
+        )
+        # Без prefetch, как в bench_serializers, и с ним, как в списке.
+        for recipes in (queryset, recipe_queryset(queryset, None)):
+            self.assertSameJSON(
+                RecipeListSerializer(
+                    list(recipes), many=True, context={"request": request}
+                ).data,
+                fast,
+            )
+        users = CustomUser.objects.all()
+        self.assertSameJSON(
+            CustomUserSerializer(
+                list(users), many=True, context={"request": request}
+            ).data,
+            serialize_users(users.values(*USER_FIELDS), request),
+        )
+
+    def test_anonymous_viewer(self):
+        self.check_viewer(AnonymousUser())
+
+    def test_authenticated_viewer(self):
+        self.check_viewer(self.viewer)
+
+    def test_bench_serializers_command(self):
+        output = StringIO()
+        call_command(
+            "bench_serializers",
+            email=self.viewer.email,
+            repeat=1,
+            stdout=output,
+        )
+        self.assertIn("recipes:", output.getvalue())
@@ -0,0 +1,51 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from api.files import protected_response, save_protected
+
+CONTENT = b"%PDF-1.4 shopping list"
+
+
+class ProtectedResponseTests(SimpleTestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overridden = override_settings(MEDIA_ROOT=media)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        self.name = save_protected("shopping_lists", CONTENT, ".pdf")
+
+    def respond(self):
+        return protected_response(self.name, "recipe.pdf", "application/pdf")
+
+    @override_settings(USE_X_ACCEL_REDIRECT=1)
+    def test_nginx_serves_file_by_internal_redirect(self):
+        response = self.respond()
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            f"/protected/shopping_lists/{self.name.rsplit('/', 1)[1]}",
+        )
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="recipe.pdf"',
+        )
+
+    @override_settings(USE_X_ACCEL_REDIRECT=0)
+    def test_django_streams_file_without_nginx(self):
+        response = self.respond()
+        self.assertFalse(response.has_header("X-Accel-Redirect"))
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="recipe.pdf"',
+        )
+        response.close()
+
+    def test_same_content_is_saved_once(self):
+        self.assertEqual(
+            save_protected("shopping_lists", CONTENT, ".pdf"), self.name
+        )
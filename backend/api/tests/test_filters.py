@@ -0,0 +1,72 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, Recipe
+from recipes.tests.factories import (make_ingredient, make_recipe, make_tag,
+                                     make_user)
+
+
+class RecipeFilterTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = make_user()
+        cls.other = make_user()
+        cls.breakfast = make_tag()
+        cls.dinner = make_tag()
+        cls.ingredient = make_ingredient()
+        cls.both = make_recipe(
+            cls.author,
+            tags=(cls.breakfast, cls.dinner),
+            ingredients=((cls.ingredient, 100),),
+        )
+        cls.untagged = make_recipe(cls.author)
+        cls.foreign = make_recipe(cls.other, tags=(cls.dinner,))
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {recipe["id"] for recipe in response.data["results"]}
+
+    def test_list_without_tags_returns_all_recipes(self):
+        response = self.client.get("/api/recipes/")
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            self.ids(response),
+            {self.both.pk, self.untagged.pk, self.foreign.pk},
+        )
+
+    def test_tags_do_not_duplicate_recipes(self):
+        response = self.client.get(
+            "/api/recipes/",
+            {"tags": [self.breakfast.slug, self.dinner.slug]},
+        )
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(self.ids(response), {self.both.pk, self.foreign.pk})
+
+    def test_author_only(self):
+        response = self.client.get("/api/recipes/", {"author": self.other.pk})
+        self.assertEqual(self.ids(response), {self.foreign.pk})
+
+    def test_is_favorited(self):
+        Favorite.objects.create(user=self.other, recipe=self.both)
+        self.client.force_authenticate(self.other)
+        response = self.client.get("/api/recipes/", {"is_favorited": 1})
+        self.assertEqual(self.ids(response), {self.both.pk})
+
+    def test_detail_is_not_filtered_away(self):
+        self.client.force_authenticate(self.author)
+        url = f"/api/recipes/{self.untagged.pk}/"
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.patch(
+            url,
+            {
+                "ingredients": [{"id": self.ingredient.pk, "amount": 5}],
+                "tags": [self.breakfast.pk],
+                "name": "Новое название",
+                "text": "Описание",
+                "cooking_time": 5,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["name"], "Новое название")
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(Recipe.objects.filter(pk=self.untagged.pk).exists())
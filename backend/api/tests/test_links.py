@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient, APITestCase
+
+from api.serializers import FollowSerializer
+from recipes.models import Favorite
+from recipes.tests.factories import make_recipe, make_user
+from users.models import Follow
+
+
+class UniqueLinkTests(APITestCase):
+    def test_duplicate_favorite_is_rejected(self):
+        user = make_user()
+        recipe = make_recipe(make_user())
+        self.client.force_authenticate(user)
+        url = f"/api/recipes/{recipe.pk}/favorite/"
+        self.assertEqual(self.client.post(url).status_code, 201)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["status"], "Рецепт уже есть в избранном!"
+        )
+
+    def test_duplicate_follow_is_rejected(self):
+        user, author = make_user(), make_user()
+        self.client.force_authenticate(user)
+        url = f"/api/users/{author.pk}/subscribe/"
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.client.post(url).status_code, 400)
+
+
+class OtherIntegrityErrorTests(TestCase):
+    def test_other_constraints_are_not_reported_as_duplicates(self):
+        user = make_user()
+        serializer = FollowSerializer()
+        with self.assertRaises(IntegrityError):
+            serializer.create({"user": user, "author": user})
+        self.assertFalse(Follow.objects.exists())
+
+
+class ParallelDuplicateTests(TransactionTestCase):
+    requests = 8
+
+    def test_parallel_duplicates_create_one_link(self):
+        user = make_user()
+        recipe = make_recipe(make_user())
+        url = f"/api/recipes/{recipe.pk}/favorite/"
+        barrier = Barrier(self.requests)
+
+        def post(_):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                return client.post(url).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.requests) as pool:
+            codes = sorted(pool.map(post, range(self.requests)))
+        self.assertEqual(codes, [201] + [400] * (self.requests - 1))
+        self.assertEqual(Favorite.objects.filter(user=user).count(), 1)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from collections import Counter
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api.authentication import token_cache
+from api.profiling import (
+    load_stacks, profile_path, read_stacks, save_stacks,
+)
+from recipes.tests.factories import make_user
+
+
+class ProfilingTestCase(APITestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        overridden = override_settings(
+            PROFILE_DIR=directory, PROFILE_INTERVAL=0.001
+        )
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        token_cache.clear()
+        self.staff = make_user(is_staff=True)
+        self.user = make_user()
+
+    def authorize(self, user):
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+
+class ProfilingMiddlewareTests(ProfilingTestCase):
+    def test_staff_request_with_flag_is_profiled(self):
+        self.authorize(self.staff)
+        response = self.client.get("/api/tags/", {"profile": 1})
+        self.assertIn("X-Profile-Samples", response)
+        self.assertTrue(os.path.exists(profile_path("tags-list")))
+
+    def test_header_flag_is_accepted(self):
+        self.authorize(self.staff)
+        response = self.client.get("/api/tags/", HTTP_X_PROFILE="1")
+        self.assertIn("X-Profile-Samples", response)
+
+    def test_flag_is_ignored_for_other_users(self):
+        self.authorize(self.user)
+        response = self.client.get("/api/tags/", {"profile": 1})
+        self.assertNotIn("X-Profile-Samples", response)
+        self.assertFalse(os.path.exists(profile_path("tags-list")))
+
+    def test_flag_is_ignored_for_anonymous(self):
+        response = self.client.get("/api/tags/", {"profile": 1})
+        self.assertNotIn("X-Profile-Samples", response)
+
+    @override_settings(PROFILE_SAMPLE_RATE=0.5)
+    def test_sampled_requests_are_saved_without_header(self):
+        with mock.patch("app.middleware.random.random", return_value=0.4):
+            response = self.client.get("/api/tags/")
+        self.assertNotIn("X-Profile-Samples", response)
+        self.assertTrue(os.path.exists(profile_path("tags-list")))
+
+    @override_settings(PROFILE_SAMPLE_RATE=0.5)
+    def test_requests_outside_sample_are_not_profiled(self):
+        with mock.patch("app.middleware.random.random", return_value=0.6):
+            self.client.get("/api/tags/")
+        self.assertFalse(os.path.exists(profile_path("tags-list")))
+
+
+class ProfileStorageTests(ProfilingTestCase):
+    @override_settings(PROFILE_MAX_SIZE=200)
+    def test_file_is_compacted_when_too_large(self):
+        for _ in range(10):
+            save_stacks("view", Counter({"a;b": 1, "a;c": 2}))
+        self.assertEqual(load_stacks("view"), {"a;b": 10, "a;c": 20})
+        self.assertLessEqual(os.path.getsize(profile_path("view")), 200)
+
+    @override_settings(PROFILE_MAX_SIZE=200)
+    def test_file_is_rotated_when_compaction_is_not_enough(self):
+        for number in range(20):
+            save_stacks("view", Counter({f"stack{number:03}": 1}))
+        self.assertTrue(os.path.exists(profile_path("view") + ".1"))
+        self.assertLessEqual(os.path.getsize(profile_path("view")), 200)
+        rotated = read_stacks(profile_path("view") + ".1")
+        self.assertEqual(sum((load_stacks("view") + rotated).values()), 20)
+
+
+class ProfileViewTests(ProfilingTestCase):
+    def setUp(self):
+        super().setUp()
+        save_stacks("tags-list", Counter({"a;b": 3}))
+
+    def test_routes_are_named(self):
+        self.assertEqual(reverse("profiles"), "/api/profiles/")
+        self.assertEqual(
+            reverse("profile", args=["tags-list"]), "/api/profiles/tags-list/"
+        )
+
+    def test_views_are_staff_only(self):
+        self.authorize(self.user)
+        url = reverse("profile", args=["tags-list"])
+        self.assertEqual(self.client.get(reverse("profiles")).status_code, 403)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+
+    def test_staff_reads_and_deletes_profiles(self):
+        self.authorize(self.staff)
+        self.assertEqual(
+            self.client.get(reverse("profiles")).data, {"tags-list": 3}
+        )
+        url = reverse("profile", args=["tags-list"])
+        self.assertEqual(self.client.get(url).content, b"a;b 3\n")
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,103 @@
+import io
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+
+FLOATS = (
+    0.1,
+    12345.678,
+    0.0001,
+    1e-05,
+    -2.5e-05,
+    1.5e-07,
+    1e15,
+    1e16,
+    -1.5e16,
+    1.7976931348623157e308,
+    5e-324,
+)
+
+
+@unittest.skipIf(orjson is None, "orjson не установлен")
+class FastJSONRendererTests(SimpleTestCase):
+    def assertSameBytes(self, data, **kwargs):
+        self.assertEqual(
+            FastJSONRenderer().render(data, **kwargs),
+            JSONRenderer().render(data, **kwargs),
+        )
+
+    def test_matches_json_renderer(self):
+        self.assertSameBytes(
+            {
+                "id": 1,
+                "name": gettext_lazy("Завтрак"),
+                "amount": Decimal("12.50"),
+                "created": datetime(2023, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+                "text": "строка\u2028с\u2029разделителями",
+                "tags": [1, 2, None, True],
+            }
+        )
+
+    def test_floats_match_json_renderer(self):
+        for value in FLOATS:
+            with self.subTest(value=value):
+                self.assertSameBytes({"totals": {"calories": value}})
+                self.assertSameBytes([value, -value])
+
+    def test_digits_followed_by_e_in_strings_are_kept(self):
+        data = {"image": "/media/recipes/3e5a,1e16.png", "id": 2}
+        self.assertSameBytes(data)
+
+    def test_plain_payload_does_not_fall_back(self):
+        with mock.patch.object(JSONRenderer, "render") as render:
+            FastJSONRenderer().render({"amount": 0.5, "name": "1e16"})
+        render.assert_not_called()
+
+    def test_nan_is_rendered_as_null(self):
+        self.assertEqual(
+            FastJSONRenderer().render({"price": float("nan")}),
+            b'{"price":null}',
+        )
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({"price": float("nan")})
+
+    def test_indented_output_uses_json_renderer(self):
+        self.assertSameBytes(
+            {"id": 1}, accepted_media_type="application/json; indent=4"
+        )
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+
+@unittest.skipIf(orjson is None, "orjson не установлен")
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, body, encoding="utf-8"):
+        return FastJSONParser().parse(
+            io.BytesIO(body), parser_context={"encoding": encoding}
+        )
+
+    def test_parses_utf8(self):
+        self.assertEqual(
+            self.parse('{"name": "Борщ", "amount": 1.5}'.encode()),
+            {"name": "Борщ", "amount": 1.5},
+        )
+
+    def test_invalid_json_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            self.parse(b'{"name": ')
+
+    def test_other_encodings_use_json_parser(self):
+        self.assertEqual(
+            self.parse('{"name": "Борщ"}'.encode("cp1251"), "cp1251"),
+            {"name": "Борщ"},
+        )
@@ -0,0 +1,98 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from recipes.tests.factories import (make_ingredient, make_recipe, make_tag,
+                                     make_user)
+
+
+class SparseFieldsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = make_user()
+        cls.tags = [make_tag(), make_tag()]
+        cls.ingredient = make_ingredient()
+        cls.recipe = make_recipe(
+            cls.author,
+            tags=reversed(cls.tags),
+            ingredients=((cls.ingredient, 50),),
+        )
+
+    def first(self, path, params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"][0]
+
+    def test_without_fields_recipe_is_complete(self):
+        recipe = self.first("/api/recipes/", {"expand": "author"})
+        self.assertEqual(recipe["author"]["id"], self.author.pk)
+        self.assertEqual(recipe["tags"][0]["id"], self.tags[0].pk)
+        self.assertIn("cooking_time", recipe)
+
+    def test_fields_keep_only_listed_columns(self):
+        recipe = self.first("/api/recipes/", {"fields": "id, name"})
+        self.assertEqual(
+            dict(recipe), {"id": self.recipe.pk, "name": self.recipe.name}
+        )
+
+    def test_nested_objects_are_collapsed_to_ids(self):
+        recipe = self.first(
+            "/api/recipes/", {"fields": "author,tags,ingredients"}
+        )
+        self.assertEqual(recipe["author"], self.author.pk)
+        self.assertEqual(recipe["tags"], [tag.pk for tag in self.tags])
+        self.assertEqual(recipe["ingredients"], [self.ingredient.pk])
+
+    def test_expand_returns_nested_objects(self):
+        recipe = self.first(
+            "/api/recipes/",
+            {"fields": "author,tags,ingredients", "expand": "author,tags"},
+        )
+        self.assertEqual(recipe["author"]["username"], self.author.username)
+        self.assertEqual(recipe["tags"][1]["slug"], self.tags[1].slug)
+        self.assertEqual(recipe["ingredients"], [self.ingredient.pk])
+
+    def test_expand_outside_fields_is_ignored(self):
+        recipe = self.first(
+            "/api/recipes/", {"fields": "id", "expand": "author"}
+        )
+        self.assertEqual(dict(recipe), {"id": self.recipe.pk})
+
+    def test_unknown_fields_are_ignored(self):
+        recipe = self.first("/api/recipes/", {"fields": "id,unknown"})
+        self.assertEqual(dict(recipe), {"id": self.recipe.pk})
+        recipe = self.first("/api/recipes/", {"fields": "unknown"})
+        self.assertEqual(dict(recipe), {})
+
+    def test_retrieve_respects_fields(self):
+        response = self.client.get(
+            f"/api/recipes/{self.recipe.pk}/", {"fields": "id,author"}
+        )
+        self.assertEqual(
+            dict(response.data),
+            {"id": self.recipe.pk, "author": self.author.pk},
+        )
+
+    def test_user_fields(self):
+        user = self.first(
+            "/api/users/", {"fields": "username,recipes,unknown"}
+        )
+        self.assertEqual(
+            dict(user),
+            {"username": self.author.username, "recipes": [self.recipe.pk]},
+        )
+
+    @override_settings(FAST_SERIALIZATION=1)
+    def test_fields_bypass_fast_serialization(self):
+        recipe = self.first("/api/recipes/", {"fields": "id,tags"})
+        self.assertEqual(
+            dict(recipe),
+            {"id": self.recipe.pk, "tags": [tag.pk for tag in self.tags]},
+        )
+        user = self.first("/api/users/", {"fields": "id"})
+        self.assertEqual(dict(user), {"id": self.author.pk})
+
+    @override_settings(FAST_SERIALIZATION=1)
+    def test_fast_serialization_without_fields_is_complete(self):
+        recipe = self.first("/api/recipes/", {"expand": "author"})
+        self.assertEqual(recipe["author"]["id"], self.author.pk)
+        self.assertIn("cooking_time", recipe)
@@ -0,0 +1,105 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import (ExportThrottle, ReadThrottle,
+                            TokenBucketThrottle, WriteThrottle)
+
+RATES = {"read": "3/min", "write": "2/min", "export": "1/hour"}
+
+
+@override_settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": RATES})
+class TokenBucketThrottleTests(SimpleTestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        self.factory = APIRequestFactory()
+        self.now = 1000.0
+        patcher = mock.patch(
+            "api.throttling.time.time", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def allowed(self, throttle_class, method="get", address="10.0.0.1"):
+        request = getattr(self.factory, method)("/", REMOTE_ADDR=address)
+        request.user = None
+        return throttle_class().allow_request(request, None)
+
+    def test_burst_is_limited_by_capacity(self):
+        results = [self.allowed(ReadThrottle) for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+
+    def test_denied_request_reports_wait(self):
+        for _ in range(3):
+            self.allowed(ReadThrottle)
+        throttle = ReadThrottle()
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1")
+        request.user = None
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertAlmostEqual(throttle.wait(), 20)
+
+    def test_tokens_refill_over_time(self):
+        for _ in range(3):
+            self.allowed(ReadThrottle)
+        self.now += 20
+        self.assertTrue(self.allowed(ReadThrottle))
+        self.assertFalse(self.allowed(ReadThrottle))
+        self.now += 600
+        results = [self.allowed(ReadThrottle) for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_clients_have_separate_buckets(self):
+        for _ in range(3):
+            self.allowed(ReadThrottle)
+        self.assertFalse(self.allowed(ReadThrottle))
+        self.assertTrue(self.allowed(ReadThrottle, address="10.0.0.2"))
+
+    def test_read_and_write_scopes(self):
+        self.assertTrue(self.allowed(WriteThrottle, method="get"))
+        self.assertTrue(self.allowed(ReadThrottle, method="post"))
+        results = [
+            self.allowed(WriteThrottle, method="post") for _ in range(3)
+        ]
+        self.assertEqual(results, [True, True, False])
+        self.assertTrue(self.allowed(ReadThrottle))
+
+    def test_export_scope_applies_to_every_method(self):
+        self.assertTrue(self.allowed(ExportThrottle, method="post"))
+        self.assertFalse(self.allowed(ExportThrottle, method="get"))
+        self.now += 3600
+        self.assertTrue(self.allowed(ExportThrottle, method="get"))
+
+    def test_parallel_burst_does_not_bypass_limit(self):
+        # У каждого потока свой объект кэша, поэтому подменяется класс.
+        backend = type(caches["throttle"])
+        get = backend.get
+
+        def slow_get(*args, **kwargs):
+            # Без блокировки все потоки успели бы прочитать полную корзину.
+            value = get(*args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        results = []
+        barrier = threading.Barrier(8)
+
+        def request():
+            barrier.wait()
+            results.append(self.allowed(ReadThrottle))
+
+        with mock.patch.object(backend, "get", slow_get):
+            threads = [threading.Thread(target=request) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(True), 3)
+
+    def test_held_lock_denies_request(self):
+        with mock.patch.object(TokenBucketThrottle, "lock_attempts", 2):
+            caches["throttle"].add("throttle:read:ip:10.0.0.1:lock", 1)
+            self.assertFalse(self.allowed(ReadThrottle))
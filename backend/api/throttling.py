@@ -0,0 +1,95 @@
+import time
+
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение частоты запросов по алгоритму token bucket.
+
+    Корзина хранится в общем кэше "throttle": ёмкость и скорость
+    пополнения задаются ставкой вида "100/min" в DEFAULT_THROTTLE_RATES.
+    Корзину меняют под блокировкой из cache.add, иначе параллельные
+    запросы прочитали бы одно число токенов и обошли бы ограничение.
+    Кто не дождался блокировки, получает отказ."""
+
+    scope = None
+    cache_alias = "throttle"
+    lock_timeout = 1
+    lock_attempts = 50
+    lock_delay = 0.002
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        capacity, period = rate.split("/")
+        self.capacity = int(capacity)
+        self.period = DURATIONS[period[0]]
+        self.wait_seconds = None
+
+    def applies(self, request, view):
+        return True
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return f"throttle:{self.scope}:{ident}"
+
+    def allow_request(self, request, view):
+        if not self.applies(request, view):
+            return True
+        cache = caches[self.cache_alias]
+        key = self.get_cache_key(request, view)
+        lock = f"{key}:lock"
+        for _ in range(self.lock_attempts):
+            if cache.add(lock, 1, self.lock_timeout):
+                break
+            time.sleep(self.lock_delay)
+        else:
+            self.wait_seconds = self.lock_timeout
+            return False
+        try:
+            return self.take_token(cache, key)
+        finally:
+            cache.delete(lock)
+
+    def take_token(self, cache, key):
+        now = time.time()
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(
+            self.capacity,
+            tokens + (now - updated) * self.capacity / self.period,
+        )
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            self.wait_seconds = (1 - tokens) * self.period / self.capacity
+        cache.set(key, (tokens, now), self.period)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ReadThrottle(TokenBucketThrottle):
+    scope = "read"
+
+    def applies(self, request, view):
+        return request.method in SAFE_METHODS
+
+
+class WriteThrottle(TokenBucketThrottle):
+    scope = "write"
+
+    def applies(self, request, view):
+        return request.method not in SAFE_METHODS
+
+
+class ExportThrottle(TokenBucketThrottle):
+    scope = "export"
@@ -1,7 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientsViewSet, RecipeViewSet, TagsViewSet
+from api.views import (CatalogBundleView, ExportCreateView, ExportDetailView,
+                       ExportDownloadView, IngredientsViewSet,
+                       ProfileDetailView, ProfileListView, RecipeViewSet,
+                       TagsViewSet)
 
 router_v1 = DefaultRouter()
 router_v1.register("recipes", RecipeViewSet, basename="recipes")
@@ -9,5 +12,17 @@ router_v1.register("ingredients", IngredientsViewSet, basename="ingredients")
 router_v1.register("tags", TagsViewSet, basename="tags")
 
 urlpatterns = [
+    path("catalog/", CatalogBundleView.as_view(), name="catalog_bundles"),
+    path("exports/", ExportCreateView.as_view(), name="exports"),
+    path("exports/<int:pk>/", ExportDetailView.as_view(), name="export"),
+    path(
+        "exports/<int:pk>/download/",
+        ExportDownloadView.as_view(),
+        name="export_download",
+    ),
+    path("profiles/", ProfileListView.as_view(), name="profiles"),
+    path(
+        "profiles/<str:name>/", ProfileDetailView.as_view(), name="profile"
+    ),
     path("", include(router_v1.urls)),
 ]
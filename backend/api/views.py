@@ -1,38 +1,60 @@
-from django.db.models import Sum
+from django.conf import settings
 from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
+from djoser.utils import logout_user
 from djoser.views import UserViewSet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.generics import ListAPIView, get_object_or_404
-from rest_framework.permissions import (AllowAny, IsAuthenticated,
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import (ListAPIView, RetrieveAPIView,
+                                     get_object_or_404)
+from rest_framework.permissions import (AllowAny, IsAdminUser, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from api.authentication import token_cache
+from api.bulk import add_links, remove_links
+from api.bundles import CatalogBundleMixin, current_manifest
+from api.conditional import (CatalogConditionalMixin, conditional_response,
+                             private_revalidate, recipe_etag)
+from api.exports import ShoppingListExport, enqueue, exports
+from api.fast_serializers import (USER_FIELDS, serialize_recipes,
+                                  serialize_users)
+from api.files import protected_response
 from api.filters import IngredientSearchFilter, RecipeFilter
 from api.pagination import CustomPageNumberPagination
 from api.permissions import IsAuthorOrReadOnly
-from api.serializers import (CustomUserSerializer, FavoriteSerializer,
-                             FollowSerializer, IngredientSerializer,
-                             RecipeListSerializer, RecipeSerializer,
-                             ShoppingCartSerializer, TagSerializer)
-from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+from api.profiling import delete_profile, list_profiles, load_stacks
+from api.serializers import (BulkIdsSerializer, CustomUserSerializer,
+                             ExportJobSerializer, ExportRequestSerializer,
+                             FavoriteSerializer, FollowSerializer,
+                             IngredientSerializer, RecipeListSerializer,
+                             RecipeSerializer, ShoppingCartSerializer,
+                             ShortRecipeSerializer, TagSerializer)
+from api.sparse import parse_selection, recipe_queryset, user_queryset
+from api.throttling import ExportThrottle, ReadThrottle, WriteThrottle
+from recipes.deletion import delete_objects
+from recipes.models import (ExportJob, Favorite, Ingredient, Recipe,
                             ShoppingCart, Tag)
+from recipes.nutrition import cart_totals, recipe_totals
 from users.models import CustomUser, Follow
 
 
-class TagsViewSet(ReadOnlyModelViewSet):
+class TagsViewSet(
+    CatalogBundleMixin, CatalogConditionalMixin, ReadOnlyModelViewSet
+):
     queryset = Tag.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = TagSerializer
 
 
-class IngredientsViewSet(ReadOnlyModelViewSet):
+class IngredientsViewSet(
+    CatalogBundleMixin, CatalogConditionalMixin, ReadOnlyModelViewSet
+):
     queryset = Ingredient.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = IngredientSerializer
@@ -52,6 +74,75 @@ class RecipeViewSet(ModelViewSet):
             return RecipeListSerializer
         return RecipeSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            return recipe_queryset(queryset, parse_selection(self.request))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        selection = parse_selection(self.request)
+        if (
+            kwargs.get("many")
+            and self.action == "list"
+            and (selection is None or "totals" in selection[0])
+        ):
+            context = self.get_serializer_context()
+            context["totals"] = recipe_totals(
+                recipe.pk for recipe in args[0]
+            )
+            kwargs["context"] = context
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        if (
+            not settings.FAST_SERIALIZATION
+            or parse_selection(request) is not None
+        ):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(super().get_queryset())
+        recipe_ids = queryset.values_list("id", flat=True)
+        page = self.paginate_queryset(recipe_ids)
+        if page is None:
+            return Response(serialize_recipes(list(recipe_ids), request))
+        return self.get_paginated_response(serialize_recipes(page, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        try:
+            author_id = (
+                Recipe.objects.filter(pk=pk)
+                .values_list("author_id", flat=True)
+                .first()
+            )
+        except ValueError:
+            author_id = None
+        if author_id is None:
+            return super().retrieve(request, *args, **kwargs)
+        return private_revalidate(
+            conditional_response(
+                request,
+                recipe_etag(pk, author_id, request.user),
+                super().retrieve,
+                *args,
+                **kwargs,
+            )
+        )
+
+    def perform_destroy(self, instance):
+        delete_objects(Recipe, [instance.pk])
+
+    @action(detail=True, methods=["get"], permission_classes=[AllowAny])
+    def similar(self, request, pk):
+        recipes = Recipe.objects.filter(
+            neighbor_of__recipe=self.get_object()
+        ).order_by("neighbor_of__rank")
+        return Response(
+            ShortRecipeSerializer(
+                recipes, many=True, context={"request": request}
+            ).data
+        )
+
     @staticmethod
     def post_method_for_actions(request, pk, serializers):
         data = {"user": request.user.id, "recipe": pk}
@@ -67,6 +158,19 @@ class RecipeViewSet(ModelViewSet):
         ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @staticmethod
+    def bulk_method_for_actions(request, model):
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+        if request.method == "DELETE":
+            return Response(
+                remove_links(request.user, ids, model, "recipe_id")
+            )
+        return Response(
+            add_links(request.user, ids, model, "recipe_id", Recipe)
+        )
+
     @action(
         detail=True, methods=["post"], permission_classes=[IsAuthenticated]
     )
@@ -81,6 +185,15 @@ class RecipeViewSet(ModelViewSet):
             request=request, pk=pk, model=Favorite
         )
 
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="favorite/bulk",
+        permission_classes=[IsAuthenticated],
+    )
+    def bulk_favorite(self, request):
+        return self.bulk_method_for_actions(request=request, model=Favorite)
+
     @action(
         detail=True, methods=["post"], permission_classes=[IsAuthenticated]
     )
@@ -95,47 +208,49 @@ class RecipeViewSet(ModelViewSet):
             request=request, pk=pk, model=ShoppingCart
         )
 
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="shopping_cart/bulk",
+        permission_classes=[IsAuthenticated],
+    )
+    def bulk_shopping_cart(self, request):
+        return self.bulk_method_for_actions(
+            request=request, model=ShoppingCart
+        )
+
     @action(
         detail=False, methods=["get"], permission_classes=[IsAuthenticated]
     )
+    def shopping_cart_totals(self, request):
+        return Response(cart_totals(request.user))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[ReadThrottle, ExportThrottle],
+    )
     def download_shopping_cart(self, request):
-        ingredients = (
-            IngredientAmount.objects.filter(recipe__carts__user=request.user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(amount__sum=Sum("amount"))
-            .order_by("ingredient__name")
+        return export_response(
+            enqueue(request.user, ShoppingListExport.name), request
         )
-        return self.construct_pdf(ingredients)
 
-    @staticmethod
-    def construct_pdf(data):
-        pdfmetrics.registerFont(
-            TTFont("Comic Sans MS", "data/Comic Sans MS.ttf", "UTF-8")
-        )
-        response = HttpResponse(content_type="application/pdf")
-        response["Content-Disposition"] = (
-            "attachment; " 'filename="recipe.pdf"'
-        )
-        page = canvas.Canvas(response)
-        page.setFont("Comic Sans MS", size=24)
-        page.drawString(200, 800, "список покупок")
-        page.setFont("Comic Sans MS", size=16)
-        page.drawString(75, 750, "Ингредиенты:")
-        height = 700
-        for i, ingredient_data in enumerate(data, 1):
-            page.drawString(
-                75,
-                height,
-                (
-                    f'{i}. {ingredient_data["ingredient__name"]} - '
-                    f'{ingredient_data["amount__sum"]} '
-                    f'{ingredient_data["ingredient__measurement_unit"]}'
-                ),
-            )
-            height -= 25
-        page.showPage()
-        page.save()
-        return response
+
+def export_response(job, request):
+    """Файл готовой выгрузки или её статус с кодом 202: статус задачи
+    опрашивается по ссылке из заголовка Location."""
+    if job.status == ExportJob.DONE:
+        export = exports[job.kind]
+        return protected_response(
+            job.file, export.filename, export.content_type
+        )
+    data = ExportJobSerializer(job, context={"request": request}).data
+    return Response(
+        data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": data["url"]},
+    )
 
 
 class CustomUserViewSet(UserViewSet):
@@ -144,6 +259,31 @@ class CustomUserViewSet(UserViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = CustomPageNumberPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            return user_queryset(queryset, parse_selection(self.request))
+        return queryset
+
+    def perform_destroy(self, instance):
+        if instance == self.request.user:
+            logout_user(self.request)
+        delete_objects(CustomUser, [instance.pk])
+
+    def list(self, request, *args, **kwargs):
+        if (
+            not settings.FAST_SERIALIZATION
+            or parse_selection(request) is not None
+        ):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values(*USER_FIELDS))
+        if page is None:
+            return Response(
+                serialize_users(queryset.values(*USER_FIELDS), request)
+            )
+        return self.get_paginated_response(serialize_users(page, request))
+
 
 class FollowViewSet(APIView):
     serializer_class = FollowSerializer
@@ -171,6 +311,35 @@ class FollowViewSet(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class FollowBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @staticmethod
+    def get_ids(request):
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["ids"]
+
+    def post(self, request):
+        return Response(
+            add_links(
+                request.user,
+                self.get_ids(request),
+                Follow,
+                "author_id",
+                CustomUser,
+                forbidden={request.user.pk},
+            )
+        )
+
+    def delete(self, request):
+        return Response(
+            remove_links(
+                request.user, self.get_ids(request), Follow, "author_id"
+            )
+        )
+
+
 class FollowListView(ListAPIView):
     serializer_class = FollowSerializer
     permission_classes = [IsAuthenticated]
@@ -180,9 +349,108 @@ class FollowListView(ListAPIView):
         following = CustomUser.objects.filter(
             following__user=self.request.user
         )
-        print(following)
+        if settings.FAST_SERIALIZATION:
+            pages = self.paginate_queryset(following.values(*USER_FIELDS))
+            return self.get_paginated_response(
+                serialize_users(pages, self.request)
+            )
         pages = self.paginate_queryset(following)
         serializer = CustomUserSerializer(
             pages, many=True, context={"request": self.request}
         )
         return self.get_paginated_response(serializer.data)
+
+
+class TokenCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @staticmethod
+    def get(request):
+        return Response(token_cache.stats())
+
+
+class ProfileListView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @staticmethod
+    def get(request):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @staticmethod
+    def get(request, name):
+        try:
+            stacks = load_stacks(name)
+        except FileNotFoundError:
+            raise NotFound
+        return HttpResponse(
+            "".join(
+                f"{stack} {count}\n" for stack, count in sorted(stacks.items())
+            ),
+            content_type="text/plain; charset=utf-8",
+        )
+
+    @staticmethod
+    def delete(request, name):
+        try:
+            delete_profile(name)
+        except FileNotFoundError:
+            raise NotFound
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ExportCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [WriteThrottle, ExportThrottle]
+
+    @staticmethod
+    def post(request):
+        serializer = ExportRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue(request.user, serializer.validated_data["kind"])
+        return Response(
+            ExportJobSerializer(job, context={"request": request}).data,
+            status=(
+                status.HTTP_200_OK
+                if job.status == ExportJob.DONE
+                else status.HTTP_202_ACCEPTED
+            ),
+        )
+
+
+class ExportDetailView(RetrieveAPIView):
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user)
+
+
+class ExportDownloadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @staticmethod
+    def get(request, pk):
+        return export_response(
+            get_object_or_404(ExportJob, pk=pk, user=request.user), request
+        )
+
+
+class CatalogBundleView(APIView):
+    permission_classes = [AllowAny]
+
+    @staticmethod
+    def get(request):
+        manifest = current_manifest()
+        if not manifest:
+            raise NotFound("Бандлы справочников ещё не собраны")
+        response = conditional_response(
+            request,
+            quote_etag(manifest["version"]),
+            lambda request: Response(manifest),
+        )
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
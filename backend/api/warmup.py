@@ -0,0 +1,16 @@
+from django.db import connections
+from django.urls import get_resolver
+
+from recipes.models import Ingredient, Tag
+from recipes.nutrition import get_table
+
+
+def warm_up():
+    """Готовит воркер к первому запросу: открывает соединения с базами,
+    загружает справочники и маршруты."""
+    for connection in connections.all():
+        connection.ensure_connection()
+    list(Tag.objects.all())
+    list(Ingredient.objects.values_list("id", "name", "measurement_unit"))
+    get_table()
+    get_resolver().url_patterns
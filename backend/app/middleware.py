@@ -0,0 +1,155 @@
+import hashlib
+import random
+import sys
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+
+from api.authentication import CachedTokenAuthentication
+from api.compression import choose_encoding, compress, is_compressible
+from api.profiling import PROFILE_HEADER, PROFILE_PARAM, Sampler, save_stacks
+from app.routers import use_primary
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет клиента за основной базой на время отставания реплик
+    после его собственной записи.
+
+    Метка хранится в кэше default, общем для всех воркеров: следующий
+    запрос клиента может попасть в другой процесс."""
+
+    key_prefix = "replica-pin:"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = self.get_client_key(request)
+        write = request.method not in SAFE_METHODS
+        token = use_primary.set(write or bool(cache.get(key)))
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(token)
+        if write and settings.REPLICA_PIN_SECONDS:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def get_client_key(self, request):
+        client = (
+            request.META.get("HTTP_AUTHORIZATION")
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get("REMOTE_ADDR", "")
+        )
+        return self.key_prefix + hashlib.sha1(client.encode()).hexdigest()
+
+
+class ProfilingMiddleware:
+    """Сэмплирующий профилировщик запросов.
+
+    Профилируются запросы сотрудников с заголовком X-Profile или
+    параметром ?profile=1 и случайная доля PROFILE_SAMPLE_RATE всех
+    запросов. Без флага стоимость сводится к двум проверкам."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        requested = (
+            PROFILE_HEADER in request.META or PROFILE_PARAM in request.GET
+        )
+        sampled = (
+            settings.PROFILE_SAMPLE_RATE
+            and random.random() < settings.PROFILE_SAMPLE_RATE
+        )
+        if not sampled and not (requested and self.is_staff(request)):
+            return self.get_response(request)
+        sampler = Sampler(sys._getframe())
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+        match = request.resolver_match
+        save_stacks(match.view_name if match else None, stacks)
+        if requested:
+            response["X-Profile-Samples"] = str(sum(stacks.values()))
+        return response
+
+    @staticmethod
+    def is_staff(request):
+        if request.user.is_authenticated:
+            return request.user.is_staff
+        try:
+            credentials = CachedTokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return credentials is not None and credentials[0].is_staff
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы API gzip или brotli.
+
+    Ответы меньше COMPRESS_MIN_SIZE не сжимаются. Сжатые байты ответов
+    с ETag сохраняются в кэше по хешу содержимого, и повторная отдача
+    того же ответа не сжимает его заново.
+
+    Страницы вне /api/ и ответы, ставящие cookie, не сжимаются: страница
+    с токеном CSRF всегда обновляет его cookie, а сжатие секрета вместе
+    с данными из запроса открывает атаку BREACH."""
+
+    key_prefix = "compressed:"
+    path_prefix = "/api/"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not request.path.startswith(self.path_prefix)
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or response.cookies
+            or not is_compressible(response)
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < settings.COMPRESS_MIN_SIZE:
+            return response
+        encoding = choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if encoding is None:
+            return response
+        content = self.compressed(response, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+    def compressed(self, response, encoding):
+        if (
+            not response.has_header("ETag")
+            or len(response.content) > settings.COMPRESS_CACHE_MAX_SIZE
+        ):
+            return compress(response.content, encoding)
+        key = (
+            f"{self.key_prefix}{encoding}:"
+            f"{hashlib.blake2b(response.content).hexdigest()}"
+        )
+        content = cache.get(key)
+        if content is None:
+            content = compress(response.content, encoding)
+            cache.set(key, content, settings.COMPRESS_CACHE_TIMEOUT)
+        return content
@@ -0,0 +1,38 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+use_primary = ContextVar("use_primary", default=False)
+
+
+class PrimaryReplicaRouter:
+    """Чтение с реплик, запись и чтение после записи - с основной базы.
+
+    Если кэш настроен как DatabaseCache, его таблица читается с основной
+    базы: с реплики кэш возвращал бы устаревшие счётчики и метки."""
+
+    @staticmethod
+    def db_for_read(model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or model._meta.app_label == "django_cache"
+            or use_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    @staticmethod
+    def db_for_write(model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    @staticmethod
+    def allow_relation(obj1, obj2, **hints):
+        return True
+
+    @staticmethod
+    def allow_migrate(db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
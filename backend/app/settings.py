@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -59,6 +60,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "app.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -66,6 +68,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "app.middleware.ReplicaPinMiddleware",
+    "app.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "app.urls"
@@ -110,6 +114,65 @@ elif DB_TYPE == "sqlite":
 else:
     raise ValueError("Unknown database type")
 
+TESTING = sys.argv[1:2] == ["test"]
+if TESTING:
+    # Миграции создаются при развёртывании, тесты строят схему по моделям.
+    MIGRATION_MODULES = {"recipes": None, "users": None}
+    if DB_TYPE == "sqlite":
+        # Общая база в памяти не ждёт блокировку, а сразу падает с
+        # "table is locked"; параллельным запросам в тестах нужен файл.
+        DATABASES["default"]["TEST"] = {
+            "NAME": os.path.join(BASE_DIR, "test_db.sqlite3")
+        }
+    # Отдельная база для тестов маршрутизатора: в DATABASE_REPLICAS её
+    # включают только сами эти тесты.
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "TEST": {
+            "NAME": (
+                os.path.join(BASE_DIR, "test_replica.sqlite3")
+                if DB_TYPE == "sqlite"
+                else "test_replica"
+            )
+        },
+    }
+
+DATABASE_REPLICAS = []
+for number, replica in enumerate(os.getenv("DB_REPLICAS", "").split()):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST" if DB_TYPE == "postgres" else "NAME": replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["app.routers.PrimaryReplicaRouter"]
+
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+
+# Кэш должен быть общим для всех воркеров: в нём лежат счётчики ETag,
+# закрепление за основной базой и корзины ограничения частоты. Его
+# читают на каждый запрос, поэтому по умолчанию это memcached, а не
+# таблица в основной базе. В тестах - память процесса.
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND",
+    "django.core.cache.backends.locmem.LocMemCache"
+    if TESTING
+    else "django.core.cache.backends.memcached.PyMemcacheCache",
+)
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "127.0.0.1:11211")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+    },
+    "throttle": {
+        "BACKEND": os.getenv("THROTTLE_CACHE_BACKEND", CACHE_BACKEND),
+        "LOCATION": os.getenv("THROTTLE_CACHE_LOCATION", CACHE_LOCATION),
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -139,6 +202,10 @@ STATIC_ROOT = BASE_DIR / "static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+PROTECTED_MEDIA_DIR = "protected"
+PROTECTED_MEDIA_URL = "/protected/"
+USE_X_ACCEL_REDIRECT = int(os.getenv("USE_X_ACCEL_REDIRECT", 0))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
@@ -146,16 +213,70 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend"
     ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "api.throttling.ReadThrottle",
+        "api.throttling.WriteThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "read": os.getenv("THROTTLE_READ_RATE", "600/min"),
+        "write": os.getenv("THROTTLE_WRITE_RATE", "60/min"),
+        "export": os.getenv("THROTTLE_EXPORT_RATE", "10/hour"),
+    },
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 6,
     "SEARCH_PARAM": "name",
 }
 
+# Без быстрых сериализаторов карточки рецептов не обновляются: после
+# включения их нужно перестроить командой rebuild_cards.
+FAST_SERIALIZATION = int(os.getenv("FAST_SERIALIZATION", 0))
+
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", 60))
+
+CATALOG_BUNDLE_DIR = "catalog"
+
+CATALOG_BUNDLE_KEEP = int(os.getenv("CATALOG_BUNDLE_KEEP", 86400))
+
+BULK_LIMIT = int(os.getenv("BULK_LIMIT", 100))
+
+OUTBOX_GAP_WAIT = int(os.getenv("OUTBOX_GAP_WAIT", 2))
+
+OUTBOX_GAP_TIMEOUT = int(os.getenv("OUTBOX_GAP_TIMEOUT", 300))
+
+ADMIN_ESTIMATE_FROM = int(os.getenv("ADMIN_ESTIMATE_FROM", 100000))
+
+SIMILAR_RECIPES_TOP_K = int(os.getenv("SIMILAR_RECIPES_TOP_K", 10))
+
+SIMILARITY_BATCH_SIZE = int(os.getenv("SIMILARITY_BATCH_SIZE", 128))
+
+SIMILARITY_TAG_WEIGHT = float(os.getenv("SIMILARITY_TAG_WEIGHT", 0.5))
+
+SIMILARITY_INDEX_MAX_AGE = int(os.getenv("SIMILARITY_INDEX_MAX_AGE", 3600))
+
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", 2))
+
+EXPORT_POLL_INTERVAL = float(os.getenv("EXPORT_POLL_INTERVAL", 1))
+
+EXPORT_JOB_TIMEOUT = int(os.getenv("EXPORT_JOB_TIMEOUT", 300))
+
+CARD_BATCH_SIZE = int(os.getenv("CARD_BATCH_SIZE", 500))
+
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", 1000))
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     "SEND_ACTIVATION_EMAIL": False,
@@ -183,3 +304,25 @@ LIMIT_COLOR = 7
 LIMIT_NAME = 200
 
 MIN_VALUE = 1
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 60))
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", BASE_DIR / "profiles")
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+
+PROFILE_MAX_SIZE = int(os.getenv("PROFILE_MAX_SIZE", 10485760))
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 5))
+
+COMPRESS_CACHE_MAX_SIZE = int(os.getenv("COMPRESS_CACHE_MAX_SIZE", 1048576))
+
+COMPRESS_CACHE_TIMEOUT = int(os.getenv("COMPRESS_CACHE_TIMEOUT", 600))
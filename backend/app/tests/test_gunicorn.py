@@ -0,0 +1,35 @@
+import importlib.util
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+def load_config():
+    spec = importlib.util.spec_from_file_location(
+        "gunicorn_conf", settings.BASE_DIR / "gunicorn.conf.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class PostWorkerInitTests(SimpleTestCase):
+    def setUp(self):
+        self.config = load_config()
+        self.worker = mock.Mock()
+
+    def test_failed_warm_up_is_logged_and_worker_starts(self):
+        with mock.patch(
+            "api.warmup.warm_up", side_effect=RuntimeError("нет базы")
+        ):
+            self.config.post_worker_init(self.worker)
+        self.worker.log.exception.assert_called_once()
+
+    def test_warm_up_can_be_disabled(self):
+        with mock.patch.dict(
+            "os.environ", {"WARMUP_ON_START": "0"}
+        ), mock.patch("api.warmup.warm_up") as warm_up:
+            self.config.post_worker_init(self.worker)
+        warm_up.assert_not_called()
+
@@ -0,0 +1,101 @@
+import gzip
+import unittest
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from api.compression import brotli
+from app.middleware import CompressionMiddleware
+
+BODY = b'{"results": [' + b'{"name": "recipe"},' * 200 + b"{}]}"
+
+
+@override_settings(COMPRESS_MIN_SIZE=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def respond(
+        self,
+        accept="gzip, br",
+        path="/api/recipes/",
+        body=BODY,
+        content_type="application/json",
+        etag=None,
+        cookie=False,
+    ):
+        def view(request):
+            response = HttpResponse(body, content_type=content_type)
+            if etag:
+                response["ETag"] = etag
+            if cookie:
+                response.set_cookie("csrftoken", "secret")
+            return response
+
+        request = self.factory.get(path, HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(view)(request)
+
+    @unittest.skipIf(brotli is None, "brotli не установлен")
+    def test_brotli_is_preferred(self):
+        response = self.respond()
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_gzip_when_brotli_not_accepted(self):
+        response = self.respond("gzip;q=0.5, br;q=0")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(
+            response["Content-Length"], str(len(response.content))
+        )
+
+    def test_identity_without_supported_encoding(self):
+        for accept in ("", "deflate", "gzip;q=0"):
+            with self.subTest(accept=accept):
+                response = self.respond(accept)
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(response.content, BODY)
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_small_response_is_not_compressed(self):
+        response = self.respond(body=b"{}")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_strong_etag_becomes_weak(self):
+        self.assertEqual(self.respond(etag='"abc"')["ETag"], 'W/"abc"')
+        self.assertEqual(self.respond(etag='W/"abc"')["ETag"], 'W/"abc"')
+
+    def test_compressed_bytes_are_cached_for_etag_responses(self):
+        first = self.respond("gzip", etag='"abc"')
+        with mock.patch("app.middleware.compress") as compress:
+            second = self.respond("gzip", etag='"abc"')
+        compress.assert_not_called()
+        self.assertEqual(second.content, first.content)
+
+    def test_responses_without_etag_are_not_cached(self):
+        self.respond("gzip")
+        with mock.patch(
+            "app.middleware.compress", return_value=b"x"
+        ) as compress:
+            self.respond("gzip")
+        compress.assert_called_once()
+
+    def test_pages_outside_api_are_not_compressed(self):
+        response = self.respond(path="/admin/", content_type="text/html")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertFalse(response.has_header("Vary"))
+
+    def test_responses_setting_cookies_are_not_compressed(self):
+        response = self.respond(cookie=True, etag='"abc"')
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["ETag"], '"abc"')
+
+    def test_admin_page_with_csrf_token_is_not_compressed(self):
+        response = self.client.get(
+            "/admin/login/", HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
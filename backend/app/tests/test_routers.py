@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from app.middleware import ReplicaPinMiddleware
+from app.routers import use_primary
+from recipes.models import Tag
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_PIN_SECONDS=60)
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """Основная база и реплика - две отдельные базы SQLite."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        # Маршрутизатор не создаёт таблиц на репликах.
+        with connections["replica"].schema_editor() as editor:
+            editor.create_model(Tag)
+        self.addCleanup(self.drop_replica_table)
+        Tag.objects.bulk_create(
+            [Tag(name="Основная", color="#000001", slug="primary")]
+        )
+        Tag.objects.using("replica").bulk_create(
+            [Tag(name="Реплика", color="#000002", slug="replica")]
+        )
+
+    @staticmethod
+    def drop_replica_table():
+        with connections["replica"].schema_editor() as editor:
+            editor.delete_model(Tag)
+
+    def read_slug(self):
+        return Tag.objects.get().slug
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(router.db_for_read(Tag), "replica")
+        self.assertEqual(router.db_for_write(Tag), "default")
+        self.assertEqual(self.read_slug(), "replica")
+        Tag.objects.bulk_create(
+            [Tag(name="Новая", color="#000003", slug="new")]
+        )
+        self.assertFalse(Tag.objects.filter(slug="new").exists())
+        self.assertTrue(
+            Tag.objects.using("default").filter(slug="new").exists()
+        )
+
+    def test_use_primary_reads_primary(self):
+        token = use_primary.set(True)
+        try:
+            self.assertEqual(self.read_slug(), "primary")
+        finally:
+            use_primary.reset(token)
+        self.assertEqual(self.read_slug(), "replica")
+
+    def test_transaction_reads_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.read_slug(), "primary")
+        self.assertEqual(self.read_slug(), "replica")
+
+    def test_without_replicas_reads_primary(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.read_slug(), "primary")
+
+    def test_cache_table_is_read_from_primary(self):
+        self.assertEqual(
+            router.db_for_read(DatabaseCache("cache", {}).cache_model_class),
+            "default",
+        )
+
+    def test_write_pins_client_to_primary(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.read_slug())
+            return HttpResponse()
+
+        middleware = ReplicaPinMiddleware(view)
+        factory = RequestFactory()
+        writer = {"HTTP_AUTHORIZATION": "Token writer"}
+        middleware(factory.get("/", **writer))
+        middleware(factory.post("/", **writer))
+        middleware(factory.get("/", **writer))
+        middleware(factory.get("/", HTTP_AUTHORIZATION="Token reader"))
+        self.assertEqual(seen, ["replica", "primary", "primary", "replica"])
+        self.assertTrue(
+            cache.get(
+                middleware.get_client_key(factory.get("/", **writer))
+            )
+        )
@@ -0,0 +1,18 @@
+import os
+
+wsgi_app = "app.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 3))
+
+
+def post_worker_init(worker):
+    if int(os.getenv("WARMUP_ON_START", 1)):
+        from api.warmup import warm_up
+
+        # Исключение отсюда gunicorn считает ошибкой загрузки и
+        # останавливает весь сервер; без прогрева воркер просто
+        # обслужит первые запросы медленнее.
+        try:
+            warm_up()
+        except Exception:
+            worker.log.exception("Прогрев воркера не удался")
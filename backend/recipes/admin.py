@@ -1,5 +1,10 @@
 from django.contrib.admin import ModelAdmin, TabularInline, register
+from django.db.models import Count
 
+from api.pagination import EstimatedCountPaginator
+from recipes.cards import deferred_refresh, mark_stale
+from recipes.deletion import DeletionAdminMixin
+from recipes.filters import AuthorInputFilter
 from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
                             ShoppingCart, Tag)
 
@@ -12,10 +17,11 @@ class TagAdmin(ModelAdmin):
 class IngredientAmountInline(TabularInline):
     model = IngredientAmount
     min_num = 1
+    autocomplete_fields = ("ingredient",)
 
 
 @register(Recipe)
-class RecipeAdmin(ModelAdmin):
+class RecipeAdmin(DeletionAdminMixin, ModelAdmin):
     inlines = [
         IngredientAmountInline,
     ]
@@ -28,13 +34,31 @@ class RecipeAdmin(ModelAdmin):
         "get_ingredients",
     )
     list_display_links = ("name",)
-    list_filter = ("author", "name", "tags")
+    list_filter = (AuthorInputFilter, "tags")
+    list_select_related = ("author",)
     search_fields = ("name",)
+    autocomplete_fields = ("author",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_related(self, request, form, formsets, change):
+        with deferred_refresh():
+            super().save_related(request, form, formsets, change)
+            mark_stale((form.instance.pk,))
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(favorites_count=Count("favorites", distinct=True))
+            .prefetch_related("tags", "ingredients")
+        )
 
     def amount_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
     amount_favorites.short_description = "В избранном"
+    amount_favorites.admin_order_field = "favorites_count"
 
     def get_tags(self, obj):
         return ", ".join([str(_) for _ in obj.tags.all()])
@@ -49,14 +73,23 @@ class RecipeAdmin(ModelAdmin):
 
 @register(Ingredient)
 class IngredientAdmin(ModelAdmin):
-    list_display = ("id", "name", "measurement_unit")
+    list_display = ("id", "name", "measurement_unit", "calories", "price")
+    search_fields = ("name",)
 
 
 @register(Favorite)
 class FavoriteAdmin(ModelAdmin):
     list_display = ("id", "user", "recipe")
+    list_select_related = ("user", "recipe")
+    autocomplete_fields = ("user", "recipe")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @register(ShoppingCart)
 class ShoppingCartAdmin(ModelAdmin):
     list_display = ("id", "user", "recipe")
+    list_select_related = ("user", "recipe")
+    autocomplete_fields = ("user", "recipe")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,146 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.fields import DateTimeField
+
+from recipes.models import IngredientAmount, Recipe, RecipeCard
+
+pending = ContextVar("pending_cards", default=None)
+datetime_field = DateTimeField()
+
+
+def build_documents(recipe_ids):
+    """Не зависящие от зрителя части RecipeListSerializer.
+
+    Вложенные объекты хранятся списками значений: jsonb не сохраняет
+    порядок ключей. Тэги упорядочены по id, ингредиенты - по id строки
+    количества, как в RecipeListSerializer. Автор хранится только
+    профилем, его рецепты и подписка добавляются при чтении; изображение
+    хранится именем файла."""
+    tags = defaultdict(list)
+    for recipe_id, *tag in (
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .values_list(
+            "recipe_id", "tag__id", "tag__name", "tag__color", "tag__slug"
+        )
+        .order_by("tag_id")
+    ):
+        tags[recipe_id].append(tag)
+    ingredients = defaultdict(list)
+    for recipe_id, *ingredient in (
+        IngredientAmount.objects.filter(recipe_id__in=recipe_ids)
+        .values_list(
+            "recipe_id",
+            "ingredient__id",
+            "ingredient__name",
+            "amount",
+            "ingredient__measurement_unit",
+        )
+        .order_by("pk")
+    ):
+        ingredients[recipe_id].append(ingredient)
+    return {
+        row["id"]: {
+            "tags": tags[row["id"]],
+            "author": [
+                row["author_id"],
+                row["author__email"],
+                row["author__username"],
+                row["author__first_name"],
+                row["author__last_name"],
+            ],
+            "ingredients": ingredients[row["id"]],
+            "name": row["name"],
+            "image": row["image"],
+            "text": row["text"],
+            "cooking_time": row["cooking_time"],
+            "pub_date": datetime_field.to_representation(row["pub_date"]),
+        }
+        for row in Recipe.objects.filter(id__in=recipe_ids).values(
+            "id",
+            "author_id",
+            "author__email",
+            "author__username",
+            "author__first_name",
+            "author__last_name",
+            "name",
+            "image",
+            "text",
+            "cooking_time",
+            "pub_date",
+        )
+    }
+
+
+def refresh_cards(recipe_ids):
+    """Перестраивает карточки пакетами по CARD_BATCH_SIZE одним upsert
+    на пакет. Возвращает новые документы."""
+    recipe_ids = list(recipe_ids)
+    documents = {}
+    for start in range(0, len(recipe_ids), settings.CARD_BATCH_SIZE):
+        batch = build_documents(
+            recipe_ids[start: start + settings.CARD_BATCH_SIZE]
+        )
+        RecipeCard.objects.bulk_create(
+            [
+                RecipeCard(recipe_id=recipe_id, document=document)
+                for recipe_id, document in batch.items()
+            ],
+            update_conflicts=True,
+            unique_fields=("recipe",),
+            update_fields=("document", "updated"),
+        )
+        documents.update(batch)
+    return documents
+
+
+def cards_enabled():
+    """Карточки читает только быстрый список с FAST_SERIALIZATION, без
+    него записи их не перестраивают."""
+    return bool(settings.FAST_SERIALIZATION)
+
+
+def mark_stale(recipe_ids):
+    """Перестраивает карточки сразу или в конце блока deferred_refresh."""
+    if not cards_enabled():
+        return
+    recipe_ids = set(recipe_ids)
+    stale = pending.get()
+    if stale is not None:
+        stale.update(recipe_ids)
+    elif recipe_ids:
+        refresh_cards(recipe_ids)
+
+
+@contextmanager
+def deferred_refresh():
+    """Копит изменённые рецепты и перестраивает их карточки один раз при
+    выходе из блока, в той же транзакции."""
+    if pending.get() is not None:
+        yield
+        return
+    token = pending.set(set())
+    try:
+        yield
+        stale = pending.get()
+    finally:
+        pending.reset(token)
+    if stale:
+        refresh_cards(stale)
+
+
+def card_documents(recipe_ids):
+    """Карточки рецептов. Отсутствующие строятся в памяти без записи:
+    чтение не пишет в основную базу, карточки сохраняют изменения
+    рецептов и команда rebuild_cards --missing."""
+    documents = dict(
+        RecipeCard.objects.filter(recipe_id__in=recipe_ids).values_list(
+            "recipe_id", "document"
+        )
+    )
+    missing = [pk for pk in recipe_ids if pk not in documents]
+    if missing:
+        documents.update(build_documents(missing))
+    return documents
@@ -0,0 +1,174 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from recipes.models import Event, EventCheckpoint
+from recipes.similarity import SimilarityIndex, refresh
+
+logger = logging.getLogger(__name__)
+
+consumers = {}
+
+
+def register(consumer_class):
+    consumers[consumer_class.name] = consumer_class
+    return consumer_class
+
+
+class Consumer:
+    """Обработчик событий outbox.
+
+    События доставляются пакетами не менее одного раза: позиция
+    сохраняется в той же транзакции только после успешного handle.
+    Событие транзакции, закоммиченной после более поздних событий,
+    приходит позже них, но не теряется (см. committed_prefix)."""
+
+    name = None
+    batch_size = 500
+
+    def handle(self, events):
+        raise NotImplementedError
+
+    def consume_batch(self, batch_size=None):
+        now = timezone.now()
+        with transaction.atomic():
+            checkpoint, _ = (
+                EventCheckpoint.objects.select_for_update().get_or_create(
+                    consumer=self.name
+                )
+            )
+            gaps = [
+                gap
+                for gap in checkpoint.gaps
+                if gap[2] > now.timestamp() - settings.OUTBOX_GAP_TIMEOUT
+            ]
+            late = gap_events(gaps)
+            events, skipped = committed_prefix(
+                Event.objects.filter(id__gt=checkpoint.position).order_by(
+                    "id"
+                )[: batch_size or self.batch_size],
+                checkpoint.position,
+                now - timedelta(seconds=settings.OUTBOX_GAP_WAIT),
+            )
+            if late or events:
+                self.handle(late + events)
+            gaps = remove_ids(gaps, [event.id for event in late]) + [
+                [first, last, now.timestamp()] for first, last in skipped
+            ]
+            if events or gaps != checkpoint.gaps:
+                if events:
+                    checkpoint.position = events[-1].id
+                checkpoint.gaps = gaps
+                checkpoint.save(update_fields=("position", "gaps", "updated"))
+        return len(late) + len(events)
+
+
+def committed_prefix(events, position, horizon):
+    """События пакета до первого свежего пропуска в id и пропущенные
+    диапазоны id.
+
+    id выдаётся при вставке, а строка видна только после коммита, поэтому
+    пропуск может оказаться событием ещё не завершённой транзакции.
+    Пропуск перед событием новее horizon (OUTBOX_GAP_WAIT) держит
+    позицию, более старый пропускается: откат транзакции иначе
+    остановил бы обработчики надолго. Пропущенные id перепроверяются
+    ещё OUTBOX_GAP_TIMEOUT секунд."""
+    ready = []
+    skipped = []
+    for event in events:
+        if event.id != position + 1:
+            if event.created > horizon:
+                break
+            skipped.append((position + 1, event.id - 1))
+        ready.append(event)
+        position = event.id
+    return ready, skipped
+
+
+def gap_events(gaps):
+    """События, закоммиченные в пропущенных ранее диапазонах id."""
+    if not gaps:
+        return []
+    ranges = Q()
+    for first, last, _ in gaps:
+        ranges |= Q(id__range=(first, last))
+    return list(Event.objects.filter(ranges).order_by("id"))
+
+
+def remove_ids(gaps, ids):
+    """Диапазоны пропусков без полученных id."""
+    result = []
+    for first, last, skipped in gaps:
+        start = first
+        for pk in sorted(pk for pk in ids if first <= pk <= last):
+            if start < pk:
+                result.append([start, pk - 1, skipped])
+            start = pk + 1
+        if start <= last:
+            result.append([start, last, skipped])
+    return result
+
+
+@register
+class LogConsumer(Consumer):
+    name = "log"
+
+    def handle(self, events):
+        for event in events:
+            logger.info("%s %s", event, event.payload)
+
+
+@register
+class SimilarityConsumer(Consumer):
+    """Обновляет индекс похожих рецептов после изменения рецептов.
+
+    Векторы рецептов держатся в памяти между пакетами, из базы читаются
+    только изменённые рецепты. Раз в SIMILARITY_INDEX_MAX_AGE секунд
+    индекс строится заново: так учитываются изменения без событий,
+    например каскадное удаление тэга."""
+
+    name = "similarity"
+
+    def __init__(self):
+        self.index = None
+        self.built = None
+
+    def handle(self, events):
+        recipe_ids = set()
+        for event in events:
+            if event.model in ("recipe", "recipe_tags"):
+                recipe_ids.add(event.object_id)
+            elif event.model in ("ingredientamount", "similarrecipe"):
+                recipe_ids.add(event.payload["recipe"])
+        if not recipe_ids:
+            return
+        if (
+            self.index is None
+            or time.monotonic() - self.built
+            > settings.SIMILARITY_INDEX_MAX_AGE
+        ):
+            self.index = SimilarityIndex()
+            self.built = time.monotonic()
+        refresh(recipe_ids, index=self.index)
+
+
+def prune_events():
+    """Удаляет события, обработанные всеми зарегистрированными
+    обработчиками. События из ещё ожидаемых пропусков не удаляются."""
+    checkpoints = list(
+        EventCheckpoint.objects.filter(consumer__in=consumers).values_list(
+            "position", "gaps"
+        )
+    )
+    if len(checkpoints) < len(consumers):
+        return 0
+    limit = min(
+        min([position] + [first - 1 for first, _, _ in gaps])
+        for position, gaps in checkpoints
+    )
+    return Event.objects.filter(id__lte=limit).delete()[0]
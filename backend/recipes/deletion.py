@@ -0,0 +1,166 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction
+
+from api.authentication import evict_user
+from api.conditional import bump_generation
+from recipes.models import (Event, Favorite, IngredientAmount, Recipe,
+                            ShoppingCart, SimilarRecipe)
+from recipes.outbox import record_many
+from users.models import CustomUser, Follow
+
+EVENT_MODELS = (
+    Recipe,
+    IngredientAmount,
+    Favorite,
+    ShoppingCart,
+    Follow,
+    SimilarRecipe,
+)
+
+GENERATIONS = {
+    CustomUser: lambda row: (f"user:{row.pk}",),
+    Recipe: lambda row: (f"recipe:{row.pk}", f"user:{row.author_id}"),
+    IngredientAmount: lambda row: (f"recipe:{row.recipe_id}",),
+    Favorite: lambda row: (f"viewer:{row.user_id}",),
+    ShoppingCart: lambda row: (f"viewer:{row.user_id}",),
+    Follow: lambda row: (f"viewer:{row.user_id}",),
+}
+
+
+def dependents(queryset):
+    """Поле связи и строки, ссылающиеся на queryset.
+
+    include_hidden=True находит и промежуточные таблицы ManyToMany."""
+    for relation in queryset.model._meta.get_fields(include_hidden=True):
+        if not relation.auto_created or relation.concrete:
+            continue
+        if not (relation.one_to_many or relation.one_to_one):
+            continue
+        field = relation.field
+        yield field, relation.related_model._base_manager.filter(
+            **{
+                f"{field.name}__in": queryset.order_by().values(
+                    relation.field_name
+                )
+            }
+        )
+
+
+def count_dependents(queryset, counts=None):
+    """Сколько строк каждой модели удалится каскадом вместе с queryset."""
+    counts = Counter() if counts is None else counts
+    for field, rows in dependents(queryset):
+        if field.remote_field.on_delete is not models.CASCADE:
+            continue
+        number = rows.count()
+        if number:
+            counts[rows.model] += number
+            count_dependents(rows, counts)
+    return counts
+
+
+def delete_dependents(queryset):
+    for field, rows in dependents(queryset):
+        on_delete = field.remote_field.on_delete
+        if on_delete is models.CASCADE:
+            delete_queryset(rows)
+        elif on_delete is models.SET_NULL:
+            rows.update(**{field.name: None})
+        elif on_delete is not models.DO_NOTHING:
+            raise NotImplementedError(
+                f"{field} с on_delete={on_delete.__name__} не поддерживается"
+            )
+
+
+def delete_rows(queryset):
+    """Удаляет строки queryset одним DELETE без Collector и сигналов.
+
+    QuerySet.delete() загрузил бы в память каждую строку модели
+    с обработчиками post_delete или каскадными связями. Сигналы здесь
+    заменяет after_delete, связи удаляет delete_dependents, а публичного
+    удаления без Collector в Django нет, поэтому вызывается
+    QuerySet._raw_delete: он есть с Django 1.9, версия Django
+    закреплена в requirements.txt."""
+    return queryset._raw_delete(queryset.db)
+
+
+def after_delete(model, rows):
+    """Заменяет сигналы post_delete, которые delete_rows не отправляет:
+    события outbox пишутся пакетом, поколения сбрасываются после
+    коммита."""
+    if model not in EVENT_MODELS and model not in GENERATIONS:
+        return
+    instances = list(rows)
+    if model in EVENT_MODELS:
+        record_many(instances, Event.DELETED)
+    if model in GENERATIONS:
+        keys = {
+            key
+            for instance in instances
+            for key in GENERATIONS[model](instance)
+        }
+        bump_generation(*keys)
+    if model is CustomUser:
+        for instance in instances:
+            evict_user(instance.pk)
+
+
+def delete_queryset(queryset):
+    """Удаляет queryset снизу вверх: сначала зависимые строки, затем
+    сами строки пакетами по DELETION_BATCH_SIZE.
+
+    Вызывается внутри транзакции delete_objects. Перед удалением пакета
+    зависимые строки проверяются ещё раз, чтобы не упасть на связях,
+    созданных во время удаления."""
+    delete_dependents(queryset)
+    model = queryset.model
+    pks = queryset.order_by().values_list("pk", flat=True)
+    deleted = 0
+    while True:
+        chunk = list(pks[: settings.DELETION_BATCH_SIZE])
+        if not chunk:
+            return deleted
+        rows = model._base_manager.filter(pk__in=chunk)
+        delete_dependents(rows)
+        after_delete(model, rows)
+        deleted += delete_rows(rows)
+
+
+def delete_objects(model, pks):
+    """Удаляет объекты model вместе со всем, что на них ссылается,
+    не загружая связанные объекты в память, как это делает Collector.
+
+    Весь каскад выполняется в одной транзакции: при ошибке не остаётся
+    частично удалённых объектов."""
+    with transaction.atomic():
+        return delete_queryset(model._base_manager.filter(pk__in=list(pks)))
+
+
+class DeletionAdminMixin:
+    """Удаление в админке через delete_objects.
+
+    Страница подтверждения показывает количество зависимых строк
+    вместо полного дерева объектов."""
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        counts = count_dependents(
+            self.model._base_manager.filter(pk__in=[obj.pk for obj in objs])
+        )
+        perms_needed = set()
+        for model in counts:
+            model_admin = self.admin_site._registry.get(model)
+            if model_admin and not model_admin.has_delete_permission(request):
+                perms_needed.add(model._meta.verbose_name)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        for model, number in counts.items():
+            model_count[model._meta.verbose_name_plural] = number
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        delete_objects(self.model, [obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        delete_objects(self.model, queryset.values_list("pk", flat=True))
@@ -0,0 +1,29 @@
+from django.contrib.admin import SimpleListFilter
+
+
+class InputFilter(SimpleListFilter):
+    """Фильтр админки с полем ввода вместо списка всех значений."""
+
+    template = "admin/input_filter.html"
+
+    def lookups(self, request, model_admin):
+        return ((None, None),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice["query_parts"] = (
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        )
+        yield all_choice
+
+
+class AuthorInputFilter(InputFilter):
+    title = "автору"
+    parameter_name = "author"
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author__username__istartswith=self.value())
+        return queryset
@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Case, F, FloatField, Sum, Value, When
+
+from recipes.models import Ingredient, Recipe
+from recipes.nutrition import get_table, recipe_totals
+from recipes.units import conversion_factor
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает векторный подсчёт калорийности и стоимости "
+        "с аннотацией Sum в ORM с тем же переводом единиц."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", default=1000, type=int)
+        parser.add_argument("--repeat", default=10, type=int)
+
+    def handle(self, *args, **options):
+        ids = list(
+            Recipe.objects.order_by("-pub_date").values_list(
+                "id", flat=True
+            )[: options["limit"]]
+        )
+        get_table()
+        deviation = max(
+            (
+                abs(numpy[field] - orm[field])
+                for numpy, orm in zip(
+                    recipe_totals(ids).values(),
+                    self.orm_totals(ids).values(),
+                )
+                for field in ("calories", "cost")
+            ),
+            default=0,
+        )
+        self.stdout.write(f"Наибольшее расхождение сумм: {deviation:.2f}")
+        for name, compute in (
+            ("numpy", lambda: recipe_totals(ids)),
+            ("orm", lambda: self.orm_totals(ids)),
+        ):
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                compute()
+            elapsed = (time.perf_counter() - started) / options["repeat"]
+            self.stdout.write(
+                f"{name}: {len(ids)} рецептов, "
+                f"{elapsed * 1000:.2f} мс на страницу"
+            )
+
+    @staticmethod
+    def unit_factor():
+        """Перевод единиц в SQL: множитель для каждой пары единиц
+        из справочника, как в NutritionTable. Для несовместимых единиц
+        NULL, и Sum их пропускает."""
+        pairs = Ingredient.objects.values_list(
+            "measurement_unit", "nutrition_unit"
+        ).distinct()
+        whens = []
+        for unit, nutrition_unit in pairs:
+            factor = conversion_factor(unit, nutrition_unit or unit)
+            if factor is not None:
+                whens.append(
+                    When(
+                        amounts__ingredient__measurement_unit=unit,
+                        amounts__ingredient__nutrition_unit=nutrition_unit,
+                        then=Value(factor),
+                    )
+                )
+        return Case(*whens, default=None, output_field=FloatField())
+
+    @classmethod
+    def orm_totals(cls, ids):
+        amount = F("amounts__amount") * cls.unit_factor()
+        ingredient = "amounts__ingredient__"
+        return {
+            pk: {
+                "calories": round(calories or 0, 1),
+                "cost": round(cost or 0, 2),
+            }
+            for pk, calories, cost in Recipe.objects.filter(id__in=ids)
+            .annotate(
+                calories=Sum(
+                    amount
+                    * F(f"{ingredient}calories")
+                    / F(f"{ingredient}nutrition_amount")
+                ),
+                cost=Sum(
+                    amount
+                    * F(f"{ingredient}price")
+                    / F(f"{ingredient}nutrition_amount")
+                ),
+            )
+            .order_by("id")
+            .values_list("id", "calories", "cost")
+        }
@@ -0,0 +1,39 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.shopping import merge_rows
+from recipes.units import UNITS
+
+OTHER_UNITS = ("шт.", "по вкусу", "щепотка")
+
+
+class Command(BaseCommand):
+    help = "Замеряет сведение единиц в списке покупок на больших корзинах."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default=100000, type=int)
+        parser.add_argument("--products", default=2000, type=int)
+        parser.add_argument("--repeat", default=5, type=int)
+
+    def handle(self, *args, **options):
+        units = list(UNITS) + list(OTHER_UNITS)
+        generator = random.Random(0)
+        rows = [
+            (
+                f"Продукт {generator.randrange(options['products'])}",
+                generator.choice(units),
+                generator.randint(1, 500),
+            )
+            for _ in range(options["rows"])
+        ]
+        started = time.perf_counter()
+        for _ in range(options["repeat"]):
+            result = merge_rows(rows)
+        elapsed = (time.perf_counter() - started) / options["repeat"]
+        self.stdout.write(
+            f"{len(rows)} строк -> {len(result)} позиций, "
+            f"{elapsed * 1000:.2f} мс, "
+            f"{elapsed / len(rows) * 1e6:.2f} мкс на строку"
+        )
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import rebuild
+
+
+class Command(BaseCommand):
+    help = "Полностью перестраивает индекс похожих рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument("--top-k", type=int)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = rebuild(options["batch_size"], options["top_k"])
+        self.stdout.write(
+            f"Индекс построен для {total} рецептов "
+            f"за {time.perf_counter() - started:.1f} с"
+        )
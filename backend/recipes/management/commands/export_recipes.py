@@ -0,0 +1,76 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.models import IngredientAmount, Recipe
+
+
+class Command(BaseCommand):
+    help = "Выгружает рецепты в формате JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "filename", nargs="?", default="-", help="Файл или - для stdout"
+        )
+        parser.add_argument("--chunk-size", default=2000, type=int)
+
+    def handle(self, *args, **options):
+        recipes = (
+            Recipe.objects.select_related("author")
+            .prefetch_related(
+                "tags",
+                Prefetch(
+                    "amounts",
+                    queryset=IngredientAmount.objects.select_related(
+                        "ingredient"
+                    ).order_by("pk"),
+                ),
+            )
+            .order_by("pk")
+        )
+        output = (
+            sys.stdout
+            if options["filename"] == "-"
+            else open(options["filename"], "w", encoding="utf-8")
+        )
+        started = time.perf_counter()
+        total = 0
+        try:
+            for recipe in recipes.iterator(chunk_size=options["chunk_size"]):
+                output.write(
+                    json.dumps(self.to_dict(recipe), ensure_ascii=False)
+                )
+                output.write("\n")
+                total += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f"Выгружено {total} рецептов за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-9):.0f} рецептов/с)"
+        )
+
+    @staticmethod
+    def to_dict(recipe):
+        return {
+            "id": recipe.pk,
+            "author": recipe.author.email,
+            "name": recipe.name,
+            "text": recipe.text,
+            "cooking_time": recipe.cooking_time,
+            "pub_date": recipe.pub_date.isoformat(),
+            "image": recipe.image.name,
+            "tags": [tag.slug for tag in recipe.tags.all()],
+            "ingredients": [
+                {
+                    "name": amount.ingredient.name,
+                    "measurement_unit": amount.ingredient.measurement_unit,
+                    "amount": amount.amount,
+                }
+                for amount in recipe.amounts.all()
+            ],
+        }
@@ -0,0 +1,188 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from api.conditional import bump_generation
+from recipes.cards import refresh_cards
+from recipes.models import Event, Ingredient, IngredientAmount, Recipe, Tag
+from recipes.outbox import record_many
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает рецепты из JSON Lines пакетами с сохранением позиции "
+        "для продолжения после сбоя. Изображения указываются путём "
+        "относительно MEDIA_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("filename")
+        parser.add_argument("--batch-size", default=1000, type=int)
+        parser.add_argument(
+            "--checkpoint", help="Файл позиции, по умолчанию <filename>.pos"
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Начать сначала, игнорируя сохранённую позицию",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help=(
+                "Остановиться на первой строке с некорректным JSON "
+                "вместо её пропуска"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options["checkpoint"] or f"{options['filename']}.pos"
+        position = 0
+        if not options["restart"] and os.path.exists(checkpoint):
+            with open(checkpoint, encoding="utf-8") as file:
+                position = int(file.read() or 0)
+        self.tags = dict(Tag.objects.values_list("slug", "id"))
+        self.ingredients = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.values_list(
+                "id", "name", "measurement_unit"
+            )
+        }
+        started = time.perf_counter()
+        imported = skipped = 0
+        try:
+            file = open(options["filename"], encoding="utf-8")
+        except FileNotFoundError:
+            raise CommandError(f"Файл {options['filename']} не найден")
+        with file:
+            lines = islice(file, position, None)
+            while True:
+                batch = list(islice(lines, options["batch_size"]))
+                if not batch:
+                    break
+                items, invalid = self.parse_lines(
+                    batch, position + 1, options["strict"]
+                )
+                created, missing = self.import_batch(items)
+                imported += created
+                skipped += invalid + missing
+                position += len(batch)
+                self.save_position(checkpoint, position)
+                self.stdout.write(f"Обработано строк: {position}")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Загружено {imported} рецептов, пропущено {skipped}, "
+            f"{elapsed:.1f} с ({imported / max(elapsed, 1e-9):.0f} "
+            "рецептов/с)"
+        )
+
+    def parse_lines(self, lines, first_number, strict):
+        """Рецепты из строк пакета и число некорректных строк.
+
+        С strict первая некорректная строка останавливает загрузку до
+        записи пакета: позиция остаётся на его начале."""
+        items = []
+        invalid = 0
+        for number, line in enumerate(lines, first_number):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as error:
+                message = f"Строка {number}: некорректный JSON: {error}"
+            else:
+                if isinstance(item, dict):
+                    items.append(item)
+                    continue
+                message = f"Строка {number}: ожидался объект рецепта"
+            if strict:
+                raise CommandError(message)
+            self.stderr.write(f"{message}, строка пропущена")
+            invalid += 1
+        return items, invalid
+
+    @staticmethod
+    def save_position(checkpoint, position):
+        temporary = f"{checkpoint}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(str(position))
+        os.replace(temporary, checkpoint)
+
+    def import_batch(self, items):
+        if not items:
+            return 0, 0
+        authors = dict(
+            CustomUser.objects.filter(
+                email__in={item["author"] for item in items}
+            ).values_list("email", "id")
+        )
+        valid = []
+        for item in items:
+            try:
+                author_id = authors[item["author"]]
+                tag_ids = [self.tags[slug] for slug in item["tags"]]
+                ingredients = [
+                    (
+                        self.ingredients[
+                            ingredient["name"], ingredient["measurement_unit"]
+                        ],
+                        ingredient["amount"],
+                    )
+                    for ingredient in item["ingredients"]
+                ]
+            except KeyError as error:
+                self.stderr.write(
+                    f"Рецепт {item.get('name')!r} пропущен: нет {error}"
+                )
+                continue
+            valid.append((item, author_id, tag_ids, ingredients))
+        with transaction.atomic():
+            recipes = Recipe.objects.bulk_create(
+                [
+                    Recipe(
+                        author_id=author_id,
+                        name=item["name"],
+                        text=item["text"],
+                        cooking_time=item["cooking_time"],
+                        image=item["image"],
+                    )
+                    for item, author_id, _, _ in valid
+                ]
+            )
+            dated = []
+            for recipe, (item, *_) in zip(recipes, valid):
+                if item.get("pub_date"):
+                    recipe.pub_date = parse_datetime(item["pub_date"])
+                    dated.append(recipe)
+            Recipe.objects.bulk_update(dated, ("pub_date",))
+            Recipe.tags.through.objects.bulk_create(
+                [
+                    Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                    for recipe, (_, _, tag_ids, _) in zip(recipes, valid)
+                    for tag_id in tag_ids
+                ]
+            )
+            amounts = IngredientAmount.objects.bulk_create(
+                [
+                    IngredientAmount(
+                        recipe_id=recipe.pk,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                    )
+                    for recipe, (*_, ingredients) in zip(recipes, valid)
+                    for ingredient_id, amount in ingredients
+                ]
+            )
+            record_many(recipes, Event.CREATED)
+            record_many(amounts, Event.CREATED)
+            refresh_cards(recipe.pk for recipe in recipes)
+        bump_generation(
+            *{f"user:{author_id}" for _, author_id, _, _ in valid}
+        )
+        return len(recipes), len(items) - len(valid)
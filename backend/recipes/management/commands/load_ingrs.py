@@ -3,6 +3,7 @@ import os
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from recipes.models import Ingredient
 
@@ -21,7 +22,7 @@ class Command(BaseCommand):
                 os.path.join(DATA_ROOT, options["filename"]),
                 "r",
                 encoding="utf-8",
-            ) as file:
+            ) as file, transaction.atomic():
                 data = csv.reader(file)
                 for name, measurement_unit in data:
                     Ingredient.objects.get_or_create(
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.cards import refresh_cards
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Перестраивает карточки рецептов пакетами."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Построить только отсутствующие карточки",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"] or settings.CARD_BATCH_SIZE
+        recipes = Recipe.objects.order_by("pk")
+        if options["missing"]:
+            recipes = recipes.filter(card__isnull=True)
+        started = time.perf_counter()
+        total = 0
+        last = 0
+        while True:
+            batch = list(
+                recipes.filter(pk__gt=last).values_list("pk", flat=True)[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                total += len(refresh_cards(batch))
+            last = batch[-1]
+            self.stdout.write(f"Обработано карточек: {total}")
+        self.stdout.write(
+            f"Построено {total} карточек "
+            f"за {time.perf_counter() - started:.1f} с"
+        )
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.consumers import consumers, prune_events
+
+
+class Command(BaseCommand):
+    help = "Обрабатывает события outbox пакетами."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(consumers))
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument("--sleep", default=1.0, type=float)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать накопленные события и завершиться",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Удалять события, обработанные всеми обработчиками",
+        )
+
+    def handle(self, *args, **options):
+        consumer = consumers[options["name"]]()
+        total = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                processed = consumer.consume_batch(options["batch_size"])
+                total += processed
+                if processed:
+                    continue
+                if options["prune"]:
+                    prune_events()
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{consumer.name}: {total} событий за {elapsed:.2f} с "
+            f"({total / max(elapsed, 1e-9):.0f} событий/с)"
+        )
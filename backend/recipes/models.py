@@ -2,6 +2,7 @@ from django.conf import settings
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
 
+from recipes.storage import hashed_storage
 from users.models import CustomUser
 
 
@@ -24,7 +25,9 @@ class Recipe(RecipeTagIngredient):
         related_name="recipes",
     )
     image = models.ImageField(
-        verbose_name="Изображение", upload_to="%Y/%m/%d/"
+        verbose_name="Изображение",
+        upload_to="recipes/",
+        storage=hashed_storage,
     )
     text = models.TextField(verbose_name="Описание")
     ingredients = models.ManyToManyField(
@@ -71,6 +74,19 @@ class Ingredient(RecipeTagIngredient):
     measurement_unit = models.CharField(
         "Единицы измерения", max_length=settings.LIMIT_NAME
     )
+    calories = models.FloatField("Калорийность, ккал", null=True, blank=True)
+    price = models.FloatField("Стоимость, руб.", null=True, blank=True)
+    nutrition_amount = models.PositiveIntegerField(
+        "Количество для калорийности и стоимости",
+        default=100,
+        validators=(MinValueValidator(settings.MIN_VALUE),),
+    )
+    nutrition_unit = models.CharField(
+        "Единицы для калорийности и стоимости",
+        max_length=settings.LIMIT_NAME,
+        blank=True,
+        help_text="Если не указаны, используются единицы измерения",
+    )
 
     class Meta:
         verbose_name = "Ингредиент"
@@ -156,3 +172,131 @@ class ShoppingCart(FavoriteShoppingCart):
                 fields=["user", "recipe"], name="shopping_cart_unique"
             )
         ]
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name="Рецепт",
+        related_name="neighbors",
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name="Похожий рецепт",
+        related_name="neighbor_of",
+    )
+    score = models.FloatField("Сходство")
+    rank = models.PositiveSmallIntegerField("Место")
+
+    class Meta:
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        ordering = ("recipe", "rank")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("recipe", "similar"), name="similar_recipe_unique"
+            ),
+        )
+
+
+class RecipeCard(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name="Рецепт",
+        related_name="card",
+    )
+    document = models.JSONField("Карточка")
+    updated = models.DateTimeField("Дата обновления", auto_now=True)
+
+    class Meta:
+        verbose_name = "Карточка рецепта"
+        verbose_name_plural = "Карточки рецептов"
+
+    def __str__(self):
+        return f"Карточка {self.recipe_id}"
+
+
+class Event(models.Model):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+    model = models.CharField("Модель", max_length=32)
+    action = models.CharField("Действие", max_length=16)
+    object_id = models.BigIntegerField("Идентификатор объекта", null=True)
+    payload = models.JSONField("Данные", default=dict)
+    created = models.DateTimeField("Дата события", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Событие"
+        verbose_name_plural = "События"
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.model}:{self.object_id} {self.action}"
+
+
+class EventCheckpoint(models.Model):
+    consumer = models.CharField("Обработчик", max_length=64, unique=True)
+    position = models.BigIntegerField("Последнее событие", default=0)
+    # Пропуски id до позиции, которые ещё могут закоммититься:
+    # [первый id, последний id, время пропуска].
+    gaps = models.JSONField("Ожидаемые пропуски", default=list, blank=True)
+    updated = models.DateTimeField("Дата обновления", auto_now=True)
+
+    class Meta:
+        verbose_name = "Позиция обработчика"
+        verbose_name_plural = "Позиции обработчиков"
+
+    def __str__(self):
+        return f"{self.consumer}: {self.position}"
+
+
+class ExportJob(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    )
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+        related_name="export_jobs",
+    )
+    kind = models.CharField("Тип выгрузки", max_length=32)
+    key = models.CharField("Хеш содержимого", max_length=64)
+    payload = models.JSONField("Данные", default=dict)
+    status = models.CharField(
+        "Статус", max_length=16, choices=STATUSES, default=PENDING
+    )
+    file = models.CharField("Файл", max_length=255, blank=True)
+    error = models.TextField("Ошибка", blank=True)
+    attempts = models.PositiveSmallIntegerField("Попытки", default=0)
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    started = models.DateTimeField("Начало обработки", null=True)
+    finished = models.DateTimeField("Окончание обработки", null=True)
+
+    class Meta:
+        verbose_name = "Выгрузка"
+        verbose_name_plural = "Выгрузки"
+        ordering = ("id",)
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "kind", "key"), name="export_job_unique"
+            ),
+        )
+        indexes = (models.Index(fields=("status", "id")),)
+
+    def __str__(self):
+        return f"{self.kind}:{self.pk} {self.status}"
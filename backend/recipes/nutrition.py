@@ -0,0 +1,99 @@
+from itertools import chain
+
+import numpy as np
+
+from api.conditional import CATALOG, get_generation
+from recipes.models import Ingredient, IngredientAmount
+from recipes.units import conversion_factor
+
+FIELDS = ("calories", "price")
+
+
+class NutritionTable:
+    """Калорийность и стоимость одной единицы измерения ингредиента
+    в массивах, индексированных id ингредиента."""
+
+    def __init__(self, generation=None):
+        self.generation = generation
+        rows = list(
+            Ingredient.objects.exclude(
+                calories__isnull=True, price__isnull=True
+            ).values_list(
+                "id",
+                "measurement_unit",
+                "nutrition_amount",
+                "nutrition_unit",
+                *FIELDS,
+            )
+        )
+        size = (
+            Ingredient.objects.order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+            or 0
+        ) + 1
+        self.values = {field: np.zeros(size) for field in FIELDS}
+        for pk, unit, amount, nutrition_unit, *values in rows:
+            factor = conversion_factor(unit, nutrition_unit or unit)
+            if factor is None:
+                continue
+            for field, value in zip(FIELDS, values):
+                if value is not None:
+                    self.values[field][pk] = value * factor / amount
+
+    @property
+    def size(self):
+        return len(self.values[FIELDS[0]])
+
+    def totals(self, rows, recipe_ids):
+        """Суммы по рецептам для строк (recipe_id, ingredient_id, amount)
+        одним векторным проходом."""
+        recipe_ids = np.asarray(sorted(recipe_ids), dtype=np.int64)
+        data = np.fromiter(chain.from_iterable(rows), dtype=np.int64)
+        data = data.reshape(-1, 3)
+        ingredients = data[:, 1]
+        known = ingredients < self.size
+        positions = np.searchsorted(recipe_ids, data[known, 0])
+        result = {}
+        for field in FIELDS:
+            weights = data[known, 2] * self.values[field][ingredients[known]]
+            result[field] = np.bincount(
+                positions, weights=weights, minlength=len(recipe_ids)
+            )
+        return {
+            int(recipe_id): {
+                "calories": round(float(result["calories"][index]), 1),
+                "cost": round(float(result["price"][index]), 2),
+            }
+            for index, recipe_id in enumerate(recipe_ids)
+        }
+
+
+_table = None
+
+
+def get_table():
+    global _table
+    generation = get_generation(CATALOG)
+    if _table is None or _table.generation != generation:
+        _table = NutritionTable(generation)
+    return _table
+
+
+def recipe_totals(recipe_ids):
+    """Калорийность и стоимость страницы рецептов за один запрос."""
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return {}
+    rows = IngredientAmount.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list("recipe_id", "ingredient_id", "amount")
+    return get_table().totals(rows, recipe_ids)
+
+
+def cart_totals(user):
+    """Калорийность и стоимость всего списка покупок пользователя."""
+    rows = IngredientAmount.objects.filter(
+        recipe__carts__user=user
+    ).values_list("recipe__carts__user_id", "ingredient_id", "amount")
+    return get_table().totals(rows, [user.pk])[user.pk]
@@ -0,0 +1,35 @@
+from recipes.models import Event
+
+
+def event_for(instance, action):
+    """Компактное событие об изменении объекта рецептов или подписок."""
+    model = instance._meta.model_name
+    payload = {
+        field: getattr(instance, f"{field}_id")
+        for field in ("author", "user", "recipe", "ingredient")
+        if hasattr(instance, f"{field}_id")
+    }
+    if model == "ingredientamount":
+        payload["amount"] = instance.amount
+    return Event(
+        model=model, action=action, object_id=instance.pk, payload=payload
+    )
+
+
+def record(instance, action):
+    event_for(instance, action).save()
+
+
+def record_many(instances, action):
+    Event.objects.bulk_create(
+        [event_for(instance, action) for instance in instances]
+    )
+
+
+def record_tags(recipe_id, action, tag_ids):
+    Event.objects.create(
+        model="recipe_tags",
+        action=action,
+        object_id=recipe_id,
+        payload={"tags": sorted(tag_ids)},
+    )
@@ -0,0 +1,55 @@
+import math
+
+from django.db.models import Sum
+
+from recipes.models import IngredientAmount
+from recipes.units import to_base
+
+DISPLAY_UNITS = {"г": ("кг", 1000), "мл": ("л", 1000)}
+
+
+def format_amount(amount):
+    """Количество без экспоненты: два знака после запятой, у значений
+    меньше 0.01 - три значащие цифры."""
+    digits = 2
+    if 0 < abs(amount) < 0.01:
+        digits -= math.floor(math.log10(abs(amount)))
+    return f"{amount:.{digits}f}".rstrip("0").rstrip(".")
+
+
+def merge_rows(rows):
+    """Сводит строки (название, единицы, количество) за один проход,
+    суммируя совместимые единицы в базовой."""
+    merged = {}
+    for name, unit, amount in rows:
+        base, factor = to_base(unit)
+        key = (name, base)
+        item = merged.get(key)
+        if item is None:
+            merged[key] = [unit, amount, amount * factor]
+            continue
+        if item[0] != unit:
+            item[0] = None
+        item[1] += amount
+        item[2] += amount * factor
+    result = []
+    for (name, base), (unit, amount, base_amount) in merged.items():
+        if unit is None:
+            unit, amount = base, base_amount
+            display, factor = DISPLAY_UNITS.get(base, (base, 1))
+            if base_amount >= factor:
+                unit, amount = display, base_amount / factor
+        result.append((name, format_amount(amount), unit))
+    result.sort()
+    return result
+
+
+def shopping_list(user):
+    """Список покупок пользователя: (название, количество, единицы)."""
+    rows = (
+        IngredientAmount.objects.filter(recipe__carts__user=user)
+        .values_list("ingredient__name", "ingredient__measurement_unit")
+        .annotate(amount__sum=Sum("amount"))
+        .order_by()
+    )
+    return merge_rows(rows)
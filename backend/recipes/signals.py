@@ -0,0 +1,101 @@
+from django.db.models import QuerySet
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from recipes.cards import cards_enabled, mark_stale
+from recipes.models import (Event, Favorite, Ingredient, IngredientAmount,
+                            Recipe, ShoppingCart, Tag)
+from recipes.outbox import record, record_tags
+from users.models import CustomUser, Follow
+
+CARD_AUTHOR_FIELDS = {"email", "username", "first_name", "last_name"}
+
+OUTBOX_MODELS = (Recipe, IngredientAmount, Favorite, ShoppingCart, Follow)
+
+
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record(instance, Event.CREATED if created else Event.UPDATED)
+
+
+def record_deleted(sender, instance, **kwargs):
+    record(instance, Event.DELETED)
+
+
+for model in OUTBOX_MODELS:
+    post_save.connect(record_saved, sender=model)
+    post_delete.connect(record_deleted, sender=model)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def record_recipe_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse or action not in ("post_add", "post_remove", "post_clear"):
+        return
+    record_tags(instance.pk, action[len("post_"):], pk_set or ())
+
+
+def origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_card(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_stale((instance.pk,))
+
+
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def refresh_ingredients_card(sender, instance, raw=False, **kwargs):
+    origin = kwargs.get("origin")
+    if raw or origin_model(origin) in (Recipe, CustomUser):
+        return
+    mark_stale((instance.recipe_id,))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def refresh_tags_card(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        mark_stale(pk_set or ())
+    else:
+        mark_stale((instance.pk,))
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_author_cards(
+    sender, instance, created, update_fields=None, raw=False, **kwargs
+):
+    if created or raw:
+        return
+    if update_fields and not CARD_AUTHOR_FIELDS & set(update_fields):
+        return
+    mark_stale(instance.recipes.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Tag)
+def refresh_tag_cards(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        mark_stale(instance.recipe_set.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_recipes(sender, instance, **kwargs):
+    if not cards_enabled():
+        return
+    instance.card_recipe_ids = list(
+        instance.recipe_set.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+def refresh_deleted_tag_cards(sender, instance, **kwargs):
+    mark_stale(getattr(instance, "card_recipe_ids", ()))
+
+
+@receiver(post_save, sender=Ingredient)
+def refresh_ingredient_cards(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        mark_stale(instance.amounts.values_list("recipe_id", flat=True))
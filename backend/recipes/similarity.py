@@ -0,0 +1,192 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from scipy import sparse
+
+from recipes.models import IngredientAmount, Recipe, SimilarRecipe
+
+
+class SimilarityIndex:
+    """Разреженные векторы ингредиентов и тэгов всех рецептов,
+    нормированные для косинусного сходства.
+
+    Индекс можно держать в памяти между пакетами: update перестраивает
+    только строки изменившихся рецептов."""
+
+    def __init__(self):
+        self.recipe_ids, self.matrix = self.vectors()
+
+    @classmethod
+    def vectors(cls, recipe_ids=None):
+        """Отсортированные id рецептов и их нормированные векторы: всех
+        рецептов или только существующих из recipe_ids.
+
+        Ингредиенты занимают чётные столбцы, тэги - нечётные, поэтому
+        новые ингредиенты и тэги не сдвигают уже построенные строки."""
+        recipes = Recipe.objects.all()
+        ingredients = IngredientAmount.objects.all()
+        tags = Recipe.tags.through.objects.all()
+        if recipe_ids is not None:
+            recipes = recipes.filter(id__in=recipe_ids)
+            ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+            tags = tags.filter(recipe_id__in=recipe_ids)
+        ids = np.fromiter(
+            recipes.order_by("id").values_list("id", flat=True),
+            dtype=np.int64,
+        )
+        ingredients = cls.pairs(
+            ingredients.values_list("recipe_id", "ingredient_id")
+        )
+        tags = cls.pairs(tags.values_list("recipe_id", "tag_id"))
+        rows = np.concatenate((ingredients[:, 0], tags[:, 0]))
+        columns = np.concatenate((ingredients[:, 1] * 2, tags[:, 1] * 2 + 1))
+        weights = np.concatenate(
+            (
+                np.ones(len(ingredients), dtype=np.float32),
+                np.full(
+                    len(tags), settings.SIMILARITY_TAG_WEIGHT, dtype=np.float32
+                ),
+            )
+        )
+        known = np.isin(rows, ids)
+        positions = np.searchsorted(ids, rows[known])
+        matrix = sparse.csr_matrix(
+            (weights[known], (positions, columns[known])),
+            shape=(len(ids), columns.max(initial=0) + 1),
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+        norms[norms == 0] = 1
+        return ids, sparse.csr_matrix(matrix.multiply(1 / norms))
+
+    def update(self, recipe_ids):
+        """Перестраивает строки рецептов recipe_ids: изменённые
+        пересчитываются, новые добавляются, удалённые убираются."""
+        recipe_ids = np.fromiter(recipe_ids, dtype=np.int64)
+        ids, rows = self.vectors(recipe_ids.tolist())
+        keep = ~np.isin(self.recipe_ids, recipe_ids)
+        kept = self.matrix[keep]
+        width = max(kept.shape[1], rows.shape[1])
+        kept.resize((kept.shape[0], width))
+        rows.resize((rows.shape[0], width))
+        merged_ids = np.concatenate((self.recipe_ids[keep], ids))
+        order = np.argsort(merged_ids, kind="stable")
+        self.recipe_ids = merged_ids[order]
+        self.matrix = sparse.vstack((kept, rows), format="csr")[order]
+
+    @staticmethod
+    def pairs(rows):
+        data = np.fromiter(
+            (value for row in rows for value in row), dtype=np.int64
+        )
+        return data.reshape(-1, 2)
+
+    def positions(self, recipe_ids):
+        """Позиции существующих рецептов recipe_ids в матрице."""
+        recipe_ids = np.fromiter(recipe_ids, dtype=np.int64)
+        positions = np.searchsorted(self.recipe_ids, recipe_ids)
+        found = positions < len(self.recipe_ids)
+        found[found] = self.recipe_ids[positions[found]] == recipe_ids[found]
+        return np.unique(positions[found])
+
+    def thresholds(self, top_k):
+        """Наименьшее сохранённое сходство для каждого рецепта или 0,
+        если у рецепта меньше top_k соседей."""
+        rows = np.array(
+            list(
+                SimilarRecipe.objects.values("recipe_id")
+                .annotate(lowest=Min("score"), count=Count("id"))
+                .values_list("recipe_id", "lowest", "count")
+            ),
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        rows = rows[rows[:, 2] >= top_k]
+        positions = np.searchsorted(self.recipe_ids, rows[:, 0])
+        found = positions < len(self.recipe_ids)
+        thresholds = np.zeros(len(self.recipe_ids))
+        thresholds[positions[found]] = rows[found, 1]
+        return thresholds
+
+    def scores(self, positions):
+        """Плотная матрица сходства пакета рецептов со всеми рецептами."""
+        scores = (self.matrix[positions] @ self.matrix.T).toarray()
+        scores[np.arange(len(positions)), positions] = 0
+        return scores
+
+    def top_k(self, positions, top_k):
+        scores = self.scores(positions)
+        k = min(top_k, scores.shape[1])
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        return (
+            np.take_along_axis(best, order, axis=1),
+            np.take_along_axis(best_scores, order, axis=1),
+        )
+
+    def store(self, positions, top_k):
+        """Пересчитывает и сохраняет соседей для рецептов на positions."""
+        if not len(positions):
+            return
+        neighbors, scores = self.top_k(positions, top_k)
+        objects = [
+            SimilarRecipe(
+                recipe_id=int(self.recipe_ids[position]),
+                similar_id=int(self.recipe_ids[neighbor]),
+                score=float(score),
+                rank=rank,
+            )
+            for position, row, row_scores in zip(positions, neighbors, scores)
+            for rank, (neighbor, score) in enumerate(zip(row, row_scores), 1)
+            if score > 0
+        ]
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(
+                recipe_id__in=self.recipe_ids[positions].tolist()
+            ).delete()
+            SimilarRecipe.objects.bulk_create(objects)
+
+
+def rebuild(batch_size=None, top_k=None):
+    """Полное построение индекса пакетами."""
+    batch_size = batch_size or settings.SIMILARITY_BATCH_SIZE
+    top_k = top_k or settings.SIMILAR_RECIPES_TOP_K
+    index = SimilarityIndex()
+    total = len(index.recipe_ids)
+    for start in range(0, total, batch_size):
+        index.store(np.arange(start, min(start + batch_size, total)), top_k)
+    return total
+
+
+def refresh(recipe_ids, batch_size=None, top_k=None, index=None):
+    """Инкрементальное обновление после изменения рецептов recipe_ids.
+
+    Пересчитываются сами рецепты, рецепты, ссылавшиеся на них, и рецепты,
+    в чей top-K они теперь попадают. Переданный index обновляется только
+    в строках recipe_ids и пригоден для следующих пакетов; без него
+    индекс строится заново."""
+    batch_size = batch_size or settings.SIMILARITY_BATCH_SIZE
+    top_k = top_k or settings.SIMILAR_RECIPES_TOP_K
+    recipe_ids = list(recipe_ids)
+    if index is None:
+        index = SimilarityIndex()
+    else:
+        index.update(recipe_ids)
+    changed = index.positions(recipe_ids)
+    affected = [
+        changed,
+        index.positions(
+            SimilarRecipe.objects.filter(
+                similar_id__in=recipe_ids
+            ).values_list("recipe_id", flat=True)
+        ),
+    ]
+    if len(changed):
+        thresholds = index.thresholds(top_k)
+        for start in range(0, len(changed), batch_size):
+            scores = index.scores(changed[start: start + batch_size])
+            affected.append(np.nonzero((scores > thresholds).any(axis=0))[0])
+    affected = np.unique(np.concatenate(affected))
+    for start in range(0, len(affected), batch_size):
+        index.store(affected[start: start + batch_size], top_k)
+    return len(affected)
@@ -0,0 +1,27 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """Хранит файлы под именем из хэша содержимого.
+
+    Файл с таким именем никогда не меняется, поэтому его можно кэшировать
+    бессрочно, а одинаковые загрузки не дублируются на диске."""
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()[:32]
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(directory, digest[:2], f"{digest}{extension}")
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+hashed_storage = HashedFileSystemStorage()
@@ -0,0 +1,49 @@
+from itertools import count
+
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+from users.models import CustomUser
+
+sequence = count(1)
+
+
+def make_user(**fields):
+    number = next(sequence)
+    fields.setdefault("email", f"user{number}@example.com")
+    fields.setdefault("username", f"user{number}")
+    fields.setdefault("first_name", "Имя")
+    fields.setdefault("last_name", "Фамилия")
+    return CustomUser.objects.create_user(password="password", **fields)
+
+
+def make_tag(**fields):
+    number = next(sequence)
+    fields.setdefault("name", f"Тэг {number}")
+    fields.setdefault("color", f"#{number:06X}")
+    fields.setdefault("slug", f"tag{number}")
+    return Tag.objects.create(**fields)
+
+
+def make_ingredient(**fields):
+    number = next(sequence)
+    fields.setdefault("name", f"Ингредиент {number}")
+    fields.setdefault("measurement_unit", "г")
+    return Ingredient.objects.create(**fields)
+
+
+def make_recipe(author, tags=(), ingredients=(), **fields):
+    """Рецепт с тэгами и ингредиентами: ingredients - пары
+    (ингредиент, количество)."""
+    number = next(sequence)
+    fields.setdefault("name", f"Рецепт {number}")
+    fields.setdefault("text", "Описание")
+    fields.setdefault("cooking_time", 10)
+    fields.setdefault("image", f"recipes/{number}.png")
+    recipe = Recipe.objects.create(author=author, **fields)
+    for tag in tags:
+        # По одному, как RecipeSerializer: add(*tags) упорядочил бы по id.
+        recipe.tags.add(tag)
+    for ingredient, amount in ingredients:
+        IngredientAmount.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    return recipe
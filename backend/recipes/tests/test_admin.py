@@ -0,0 +1,19 @@
+from django.test import TestCase
+
+from recipes.tests.factories import make_recipe, make_user
+
+
+class RecipeAdminTests(TestCase):
+    def test_author_input_filter(self):
+        admin = make_user(is_staff=True, is_superuser=True)
+        make_recipe(make_user(username="alice"), name="Шарлотка")
+        make_recipe(make_user(username="bob"), name="Борщ")
+        self.client.force_login(admin)
+        response = self.client.get(
+            "/admin/recipes/recipe/", {"author": "ali"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "admin/input_filter.html")
+        self.assertContains(response, 'name="author" value="ali"')
+        self.assertContains(response, "Шарлотка")
+        self.assertNotContains(response, "Борщ")
@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from recipes.cards import build_documents, deferred_refresh, mark_stale
+from recipes.models import RecipeCard
+from recipes.tests.factories import (make_ingredient, make_recipe, make_tag,
+                                     make_user)
+
+
+def stored_document(recipe):
+    return RecipeCard.objects.get(recipe=recipe).document
+
+
+@override_settings(FAST_SERIALIZATION=1)
+class CardWriteTests(TestCase):
+    def setUp(self):
+        self.author = make_user(first_name="Анна")
+        self.tag = make_tag(name="Завтрак")
+        self.recipe = make_recipe(
+            self.author,
+            tags=(self.tag,),
+            ingredients=((make_ingredient(), 100),),
+        )
+
+    def test_card_is_built_with_recipe(self):
+        self.assertEqual(
+            stored_document(self.recipe),
+            build_documents([self.recipe.pk])[self.recipe.pk],
+        )
+
+    def test_author_change_refreshes_card(self):
+        self.author.first_name = "Мария"
+        self.author.save()
+        self.assertEqual(stored_document(self.recipe)["author"][3], "Мария")
+
+    def test_tag_change_refreshes_card(self):
+        self.tag.name = "Ужин"
+        self.tag.save()
+        self.assertEqual(stored_document(self.recipe)["tags"][0][1], "Ужин")
+        self.tag.delete()
+        self.assertEqual(stored_document(self.recipe)["tags"], [])
+
+    def test_deferred_refresh_builds_each_card_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_refresh():
+                for _ in range(3):
+                    mark_stale((self.recipe.pk,))
+                self.assertEqual(len(queries), 0)
+        upserts = [
+            query
+            for query in queries
+            if query["sql"].startswith('INSERT INTO "recipes_recipecard"')
+        ]
+        self.assertEqual(len(upserts), 1)
+
+
+@override_settings(FAST_SERIALIZATION=0)
+class CardsDisabledTests(TestCase):
+    def test_writes_skip_cards(self):
+        author = make_user()
+        tag = make_tag()
+        recipe = make_recipe(author, tags=(tag,))
+        author.first_name = "Мария"
+        author.save()
+        tag.delete()
+        recipe.save()
+        self.assertFalse(RecipeCard.objects.exists())
+
+
+@override_settings(FAST_SERIALIZATION=1)
+class CardReadTests(TestCase):
+    def setUp(self):
+        self.recipes = [make_recipe(make_user()) for _ in range(3)]
+        RecipeCard.objects.filter(recipe=self.recipes[0]).delete()
+
+    def test_missing_card_is_built_without_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/recipes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {recipe["id"] for recipe in response.json()["results"]},
+            {recipe.pk for recipe in self.recipes},
+        )
+        self.assertFalse(
+            RecipeCard.objects.filter(recipe=self.recipes[0]).exists()
+        )
+        self.assertEqual(
+            [
+                query["sql"]
+                for query in queries
+                if not query["sql"].startswith("SELECT")
+            ],
+            [],
+        )
+
+    def test_rebuild_command_stores_missing_cards(self):
+        call_command("rebuild_cards", missing=True, stdout=StringIO())
+        self.assertEqual(RecipeCard.objects.count(), 3)
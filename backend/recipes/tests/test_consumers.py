@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from recipes.consumers import Consumer, prune_events
+from recipes.models import Event, EventCheckpoint
+
+
+class RecordingConsumer(Consumer):
+    name = "test"
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.seen = []
+
+    def handle(self, events):
+        if self.fail:
+            raise RuntimeError("handle failed")
+        self.seen.extend(event.id for event in events)
+
+
+@override_settings(OUTBOX_GAP_WAIT=60, OUTBOX_GAP_TIMEOUT=600)
+class ConsumerTests(TestCase):
+    def setUp(self):
+        self.events = [
+            Event.objects.create(model="recipe", action=Event.CREATED)
+            for _ in range(5)
+        ]
+        self.ids = [event.id for event in self.events]
+        # Последовательность id не откатывается вместе с тестом.
+        EventCheckpoint.objects.create(
+            consumer="test", position=self.ids[0] - 1
+        )
+
+    def position(self):
+        return EventCheckpoint.objects.get(consumer="test").position
+
+    def test_contiguous_events_are_consumed_in_batches(self):
+        consumer = RecordingConsumer()
+        self.assertEqual(consumer.consume_batch(3), 3)
+        self.assertEqual(consumer.consume_batch(3), 2)
+        self.assertEqual(consumer.consume_batch(3), 0)
+        self.assertEqual(consumer.seen, self.ids)
+        self.assertEqual(self.position(), self.ids[-1])
+
+    def test_recent_gap_holds_the_position(self):
+        # Пропуск - событие транзакции, которая ещё не закоммичена.
+        self.events[2].delete()
+        consumer = RecordingConsumer()
+        self.assertEqual(consumer.consume_batch(), 2)
+        self.assertEqual(consumer.consume_batch(), 0)
+        self.assertEqual(self.position(), self.ids[1])
+        late = Event(id=self.ids[2], model="recipe", action=Event.CREATED)
+        late.save()
+        self.assertEqual(consumer.consume_batch(), 3)
+        self.assertEqual(consumer.seen, self.ids)
+
+    def test_old_gap_is_skipped(self):
+        self.events[2].delete()
+        Event.objects.update(created=timezone.now() - timedelta(minutes=2))
+        consumer = RecordingConsumer()
+        self.assertEqual(consumer.consume_batch(), 4)
+        self.assertEqual(self.position(), self.ids[-1])
+
+    def test_failed_handle_keeps_the_position(self):
+        with self.assertRaises(RuntimeError):
+            RecordingConsumer(fail=True).consume_batch()
+        self.assertEqual(self.position(), self.ids[0] - 1)
+        consumer = RecordingConsumer()
+        consumer.consume_batch()
+        self.assertEqual(consumer.seen, self.ids)
+
+    def rolled_back_gap(self):
+        """Событие откатившейся транзакции и следующее за ним."""
+        try:
+            with transaction.atomic():
+                rolled_back = Event.objects.create(
+                    model="recipe", action=Event.CREATED
+                )
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        # SQLite выдаёт id откатившейся строки снова, Postgres - нет.
+        after = Event.objects.create(
+            id=rolled_back.id + 1, model="recipe", action=Event.CREATED
+        )
+        return rolled_back.id, after.id
+
+    @override_settings(OUTBOX_GAP_WAIT=0)
+    def test_rolled_back_gap_does_not_stall(self):
+        gap, after = self.rolled_back_gap()
+        consumer = RecordingConsumer()
+        self.assertEqual(consumer.consume_batch(), 6)
+        self.assertEqual(consumer.seen, self.ids + [after])
+        self.assertEqual(self.position(), after)
+        checkpoint = EventCheckpoint.objects.get(consumer="test")
+        self.assertEqual([gap[:2] for gap in checkpoint.gaps], [[gap, gap]])
+
+    @override_settings(OUTBOX_GAP_WAIT=0)
+    def test_late_event_in_skipped_gap_is_delivered(self):
+        gap, _ = self.rolled_back_gap()
+        consumer = RecordingConsumer()
+        consumer.consume_batch()
+        # Долгая транзакция закоммитила событие после пропуска.
+        Event.objects.create(id=gap, model="recipe", action=Event.CREATED)
+        consumer.seen.clear()
+        self.assertEqual(consumer.consume_batch(), 1)
+        self.assertEqual(consumer.seen, [gap])
+        self.assertEqual(
+            EventCheckpoint.objects.get(consumer="test").gaps, []
+        )
+        self.assertEqual(consumer.consume_batch(), 0)
+
+    @override_settings(OUTBOX_GAP_WAIT=0)
+    def test_skipped_gap_expires(self):
+        gap, _ = self.rolled_back_gap()
+        RecordingConsumer().consume_batch()
+        with self.settings(OUTBOX_GAP_TIMEOUT=0):
+            self.assertEqual(RecordingConsumer().consume_batch(), 0)
+        self.assertEqual(
+            EventCheckpoint.objects.get(consumer="test").gaps, []
+        )
+        Event.objects.create(id=gap, model="recipe", action=Event.CREATED)
+        self.assertEqual(RecordingConsumer().consume_batch(), 0)
+
+    def test_prune_keeps_events_after_open_gap(self):
+        gap = [self.ids[2], self.ids[2], timezone.now().timestamp()]
+        EventCheckpoint.objects.create(
+            consumer="log", position=self.ids[-1], gaps=[gap]
+        )
+        EventCheckpoint.objects.create(
+            consumer="similarity", position=self.ids[-1]
+        )
+        self.assertEqual(prune_events(), 2)
+        self.assertEqual(
+            list(Event.objects.values_list("id", flat=True)), self.ids[2:]
+        )
@@ -0,0 +1,160 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.authentication import CachedTokenAuthentication, token_cache
+from api.conditional import get_generation
+from recipes.deletion import count_dependents, delete_objects
+from recipes.models import (Event, ExportJob, Favorite, IngredientAmount,
+                            Recipe, ShoppingCart, SimilarRecipe)
+from recipes.tests.factories import (make_ingredient, make_recipe, make_tag,
+                                     make_user)
+from users.models import CustomUser, Follow
+
+MODELS = (
+    CustomUser,
+    Recipe,
+    Recipe.tags.through,
+    IngredientAmount,
+    Favorite,
+    ShoppingCart,
+    Follow,
+    SimilarRecipe,
+    Token,
+    ExportJob,
+)
+
+
+def row_counts():
+    return {model: model._base_manager.count() for model in MODELS}
+
+
+@override_settings(DELETION_BATCH_SIZE=1)
+class DeleteObjectsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.other = make_user()
+        tag = make_tag()
+        ingredient = make_ingredient()
+        self.recipes = [
+            make_recipe(self.user, tags=(tag,), ingredients=((ingredient, 1),))
+            for _ in range(2)
+        ]
+        self.kept = make_recipe(self.other, tags=(tag,))
+        Favorite.objects.create(user=self.other, recipe=self.recipes[0])
+        Favorite.objects.create(user=self.user, recipe=self.kept)
+        ShoppingCart.objects.create(user=self.user, recipe=self.kept)
+        Follow.objects.create(user=self.user, author=self.other)
+        Follow.objects.create(user=self.other, author=self.user)
+        SimilarRecipe.objects.create(
+            recipe=self.kept, similar=self.recipes[1], score=1, rank=1
+        )
+        ExportJob.objects.create(user=self.user, kind="shopping_list", key="1")
+        self.token = Token.objects.create(user=self.user)
+
+    def test_cascade_removes_every_dependent_row(self):
+        expected = count_dependents(
+            CustomUser.objects.filter(pk=self.user.pk)
+        )
+        before = row_counts()
+        delete_objects(CustomUser, [self.user.pk])
+        after = row_counts()
+        self.assertEqual(before[CustomUser] - after[CustomUser], 1)
+        for model in MODELS[1:]:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    before[model] - after[model], expected.get(model, 0)
+                )
+        self.assertTrue(Recipe.objects.filter(pk=self.kept.pk).exists())
+        self.assertEqual(self.kept.tags.count(), 1)
+        self.assertFalse(Follow.objects.filter(author=self.user.pk).exists())
+
+    def test_deleted_rows_are_recorded_in_outbox(self):
+        Event.objects.all().delete()
+        delete_objects(CustomUser, [self.user.pk])
+        deleted = set(
+            Event.objects.filter(action=Event.DELETED).values_list(
+                "model", "object_id"
+            )
+        )
+        self.assertLessEqual(
+            {("recipe", recipe.pk) for recipe in self.recipes}, deleted
+        )
+        self.assertEqual(
+            {model for model, _ in deleted},
+            {
+                "recipe",
+                "ingredientamount",
+                "favorite",
+                "shoppingcart",
+                "follow",
+                "similarrecipe",
+            },
+        )
+
+    def test_generations_and_token_cache_reset_after_commit(self):
+        CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        generations = {
+            scope: get_generation(scope)
+            for scope in (
+                f"user:{self.user.pk}",
+                f"recipe:{self.recipes[0].pk}",
+                f"viewer:{self.other.pk}",
+            )
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_objects(CustomUser, [self.user.pk])
+            self.assertEqual(
+                get_generation(f"user:{self.user.pk}"),
+                generations[f"user:{self.user.pk}"],
+            )
+        for scope, generation in generations.items():
+            with self.subTest(scope=scope):
+                self.assertNotEqual(get_generation(scope), generation)
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+    def test_failure_rolls_back_whole_cascade(self):
+        before = row_counts()
+        with mock.patch(
+            "recipes.deletion.delete_rows", side_effect=[1, 1, RuntimeError]
+        ):
+            with self.assertRaises(RuntimeError):
+                delete_objects(CustomUser, [self.user.pk])
+        self.assertEqual(row_counts(), before)
+
+
+class DeletionAdminMixinTests(TestCase):
+    def setUp(self):
+        self.admin = make_user(is_staff=True, is_superuser=True)
+        self.user = make_user()
+        make_recipe(self.user, ingredients=((make_ingredient(), 1),))
+        self.client.force_login(self.admin)
+        self.url = f"/admin/users/customuser/{self.user.pk}/delete/"
+
+    def test_confirmation_shows_dependent_counts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        counts = dict(response.context["model_count"])
+        self.assertEqual(counts["Пользователи"], 1)
+        self.assertEqual(counts["Рецепты"], 1)
+        self.assertEqual(counts["Количество ингредиентов"], 1)
+
+    def test_delete_removes_user_with_dependents(self):
+        response = self.client.post(self.url, {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(CustomUser.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Recipe.objects.filter(author=self.user.pk).exists())
+
+    def test_bulk_action_deletes_selected_users(self):
+        other = make_user()
+        response = self.client.post(
+            "/admin/users/customuser/",
+            {
+                "action": "delete_selected",
+                "_selected_action": [self.user.pk, other.pk],
+                "post": "yes",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(CustomUser.objects.all()), [self.admin])
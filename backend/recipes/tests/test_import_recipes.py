@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from recipes.models import Recipe
+from recipes.tests.factories import make_ingredient, make_tag, make_user
+
+
+class ImportRecipesTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.filename = os.path.join(directory, "recipes.jsonl")
+        author = make_user()
+        tag = make_tag()
+        ingredient = make_ingredient()
+        recipe = {
+            "author": author.email,
+            "tags": [tag.slug],
+            "ingredients": [
+                {
+                    "name": ingredient.name,
+                    "measurement_unit": ingredient.measurement_unit,
+                    "amount": 100,
+                }
+            ],
+            "text": "Описание",
+            "cooking_time": 10,
+            "image": "recipes/imported.png",
+        }
+        lines = [
+            json.dumps({**recipe, "name": "Первый"}, ensure_ascii=False),
+            '{"name": "Оборванная строка',
+            "[1, 2]",
+            json.dumps({**recipe, "name": "Второй"}, ensure_ascii=False),
+        ]
+        with open(self.filename, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    def run_import(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_recipes",
+            self.filename,
+            *args,
+            batch_size=10,
+            stdout=stdout,
+            stderr=stderr,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_invalid_lines_are_reported_and_skipped(self):
+        stdout, stderr = self.run_import()
+        self.assertEqual(
+            sorted(Recipe.objects.values_list("name", flat=True)),
+            ["Второй", "Первый"],
+        )
+        self.assertIn("Строка 2: некорректный JSON", stderr)
+        self.assertIn("Строка 3: ожидался объект рецепта", stderr)
+        self.assertIn("пропущено 2", stdout)
+        with open(f"{self.filename}.pos", encoding="utf-8") as file:
+            self.assertEqual(file.read(), "4")
+
+    def test_strict_import_stops_before_the_batch(self):
+        with self.assertRaisesMessage(CommandError, "Строка 2"):
+            self.run_import("--strict")
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(os.path.exists(f"{self.filename}.pos"))
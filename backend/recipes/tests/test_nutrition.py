@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipes.models import IngredientAmount, ShoppingCart
+from recipes.nutrition import cart_totals, recipe_totals
+from recipes.tests.factories import make_ingredient, make_recipe, make_user
+from recipes.units import conversion_factor
+
+
+def python_totals(recipe):
+    """Эталон: сумма по строкам рецепта в цикле Python."""
+    calories = cost = 0
+    for row in IngredientAmount.objects.filter(recipe=recipe).select_related(
+        "ingredient"
+    ):
+        ingredient = row.ingredient
+        factor = conversion_factor(
+            ingredient.measurement_unit,
+            ingredient.nutrition_unit or ingredient.measurement_unit,
+        )
+        if factor is None:
+            continue
+        share = row.amount * factor / ingredient.nutrition_amount
+        if ingredient.calories is not None:
+            calories += share * ingredient.calories
+        if ingredient.price is not None:
+            cost += share * ingredient.price
+    return {"calories": round(calories, 1), "cost": round(cost, 2)}
+
+
+class NutritionTotalsTests(TestCase):
+    def setUp(self):
+        # Таблица калорийности кэшируется по поколению каталога.
+        cache.clear()
+        self.user = make_user()
+        flour = make_ingredient(
+            measurement_unit="кг",
+            nutrition_unit="г",
+            calories=364,
+            price=4.5,
+        )
+        milk = make_ingredient(
+            measurement_unit="стакан",
+            nutrition_unit="мл",
+            calories=60,
+            price=None,
+        )
+        butter = make_ingredient(
+            measurement_unit="ст. л.",
+            nutrition_unit="ст. л.",
+            nutrition_amount=1,
+            calories=None,
+            price=12.3,
+        )
+        sugar = make_ingredient(calories=387, price=8.9)
+        egg = make_ingredient(
+            measurement_unit="шт.", nutrition_unit="г", calories=157
+        )
+        water = make_ingredient(measurement_unit="мл")
+        self.recipes = [
+            make_recipe(
+                self.user,
+                ingredients=((flour, 2), (milk, 3), (butter, 5), (sugar, 7)),
+            ),
+            make_recipe(self.user, ingredients=((egg, 2), (water, 300))),
+            make_recipe(self.user, ingredients=((sugar, 1), (milk, 1))),
+            make_recipe(self.user),
+        ]
+
+    def test_totals_match_python_sum(self):
+        totals = recipe_totals(recipe.pk for recipe in self.recipes)
+        for recipe in self.recipes:
+            with self.subTest(recipe=recipe.name):
+                self.assertEqual(totals[recipe.pk], python_totals(recipe))
+
+    def test_mixed_units_are_converted(self):
+        self.assertEqual(
+            recipe_totals([self.recipes[0].pk])[self.recipes[0].pk],
+            {
+                "calories": round(2000 * 3.64 + 750 * 0.6 + 7 * 3.87, 1),
+                "cost": round(2000 * 0.045 + 5 * 12.3 + 7 * 0.089, 2),
+            },
+        )
+
+    def test_incompatible_and_missing_values_count_as_zero(self):
+        self.assertEqual(
+            recipe_totals([self.recipes[1].pk, self.recipes[3].pk]),
+            {
+                self.recipes[1].pk: {"calories": 0, "cost": 0},
+                self.recipes[3].pk: {"calories": 0, "cost": 0},
+            },
+        )
+
+    def test_cart_totals_sum_recipes_in_cart(self):
+        for recipe in self.recipes[:3]:
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        expected = [python_totals(recipe) for recipe in self.recipes[:3]]
+        totals = cart_totals(self.user)
+        self.assertAlmostEqual(
+            totals["calories"], sum(row["calories"] for row in expected), 0
+        )
+        self.assertAlmostEqual(
+            totals["cost"], sum(row["cost"] for row in expected), 1
+        )
+
+    def test_bench_compares_same_work(self):
+        output = StringIO()
+        call_command("bench_nutrition", repeat=1, stdout=output)
+        self.assertIn("Наибольшее расхождение сумм: 0.00", output.getvalue())
@@ -0,0 +1,75 @@
+from django.test import SimpleTestCase, TestCase
+
+from recipes.models import ShoppingCart
+from recipes.shopping import format_amount, merge_rows, shopping_list
+from recipes.tests.factories import make_ingredient, make_recipe, make_user
+
+
+class FormatAmountTests(SimpleTestCase):
+    def test_fixed_point(self):
+        cases = {
+            0: "0",
+            5: "5",
+            100: "100",
+            1.5: "1.5",
+            0.1 + 0.2: "0.3",
+            2.675: "2.67",
+            123456.7: "123456.7",
+            1234567: "1234567",
+            10 ** 9: "1000000000",
+            0.001: "0.001",
+            0.000123456: "0.000123",
+            0.0099999: "0.01",
+        }
+        for amount, expected in cases.items():
+            with self.subTest(amount=amount):
+                self.assertEqual(format_amount(amount), expected)
+
+
+class MergeRowsTests(SimpleTestCase):
+    def test_same_unit_is_summed_without_conversion(self):
+        self.assertEqual(
+            merge_rows([("Соль", "г", 5), ("Соль", "г", 1500)]),
+            [("Соль", "1505", "г")],
+        )
+
+    def test_compatible_units_are_merged_in_display_unit(self):
+        self.assertEqual(
+            merge_rows([("Мука", "г", 500), ("Мука", "кг", 1)]),
+            [("Мука", "1.5", "кг")],
+        )
+        self.assertEqual(
+            merge_rows([("Молоко", "ст. л.", 2), ("Молоко", "мл", 100)]),
+            [("Молоко", "130", "мл")],
+        )
+
+    def test_incompatible_units_stay_separate_and_sorted(self):
+        self.assertEqual(
+            merge_rows(
+                [
+                    ("Яйца", "шт.", 3),
+                    ("Сахар", "г", 1234567),
+                    ("Яйца", "г", 50),
+                    ("Сахар", "кг", 0.5),
+                ]
+            ),
+            [
+                ("Сахар", "1235.07", "кг"),
+                ("Яйца", "3", "шт."),
+                ("Яйца", "50", "г"),
+            ],
+        )
+
+
+class ShoppingListTests(TestCase):
+    def test_amounts_of_cart_recipes_are_summed(self):
+        user = make_user()
+        author = make_user()
+        flour = make_ingredient(name="Мука", measurement_unit="г")
+        for amount in (700, 800):
+            ShoppingCart.objects.create(
+                user=user,
+                recipe=make_recipe(author, ingredients=((flour, amount),)),
+            )
+        make_recipe(author, ingredients=((flour, 100),))
+        self.assertEqual(shopping_list(user), [("Мука", "1500", "г")])
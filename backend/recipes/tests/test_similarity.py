@@ -0,0 +1,116 @@
+import numpy as np
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from recipes.consumers import SimilarityConsumer
+from recipes.models import Event, IngredientAmount, Recipe, SimilarRecipe
+from recipes.similarity import SimilarityIndex, rebuild, refresh
+from recipes.tests.factories import (make_ingredient, make_recipe, make_tag,
+                                     make_user)
+
+
+class SimilarityTestData:
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = make_user()
+        cls.tags = [make_tag() for _ in range(3)]
+        cls.ingredients = [make_ingredient() for _ in range(6)]
+        cls.recipes = [
+            make_recipe(
+                cls.author,
+                tags=(cls.tags[number % 3],),
+                ingredients=(
+                    (cls.ingredients[number % 6], 1),
+                    (cls.ingredients[(number + 1) % 6], 1),
+                ),
+            )
+            for number in range(10)
+        ]
+
+    def neighbors(self):
+        return list(
+            SimilarRecipe.objects.order_by("recipe_id", "rank").values_list(
+                "recipe_id", "similar_id", "rank"
+            )
+        )
+
+
+class SimilarityIndexTests(SimilarityTestData, TestCase):
+    def assertSameIndex(self, index):
+        fresh = SimilarityIndex()
+        np.testing.assert_array_equal(index.recipe_ids, fresh.recipe_ids)
+        width = max(index.matrix.shape[1], fresh.matrix.shape[1])
+        index.matrix.resize((index.matrix.shape[0], width))
+        fresh.matrix.resize((fresh.matrix.shape[0], width))
+        np.testing.assert_allclose(
+            index.matrix.toarray(), fresh.matrix.toarray()
+        )
+
+    def test_update_matches_full_build(self):
+        index = SimilarityIndex()
+        changed = self.recipes[0]
+        IngredientAmount.objects.filter(recipe=changed).delete()
+        IngredientAmount.objects.create(
+            recipe=changed, ingredient=make_ingredient(), amount=1
+        )
+        changed.tags.add(self.tags[1])
+        added = make_recipe(
+            self.author,
+            tags=(make_tag(),),
+            ingredients=((self.ingredients[2], 1),),
+        )
+        removed = self.recipes[5].pk
+        Recipe.objects.filter(pk=removed).delete()
+        index.update([changed.pk, added.pk, removed])
+        self.assertSameIndex(index)
+
+    def test_refresh_with_kept_index_matches_rebuild(self):
+        rebuild(batch_size=4, top_k=3)
+        index = SimilarityIndex()
+        changed = self.recipes[3]
+        IngredientAmount.objects.filter(recipe=changed).delete()
+        IngredientAmount.objects.create(
+            recipe=changed, ingredient=self.ingredients[0], amount=1
+        )
+        refresh([changed.pk], batch_size=4, top_k=3, index=index)
+        added = make_recipe(
+            self.author,
+            tags=(self.tags[0],),
+            ingredients=((self.ingredients[0], 1),),
+        )
+        refresh([added.pk], batch_size=4, top_k=3, index=index)
+        incremental = self.neighbors()
+        rebuild(batch_size=4, top_k=3)
+        self.assertEqual(incremental, self.neighbors())
+
+    def test_consumer_keeps_index_between_batches(self):
+        consumer = SimilarityConsumer()
+        event = Event(model="recipe", object_id=self.recipes[0].pk)
+        consumer.handle([event])
+        index = consumer.index
+        consumer.handle([event])
+        self.assertIs(consumer.index, index)
+        with self.settings(SIMILARITY_INDEX_MAX_AGE=-1):
+            consumer.handle([event])
+        self.assertIsNot(consumer.index, index)
+
+
+class SimilarEndpointTests(SimilarityTestData, APITestCase):
+    def test_similar_recipes(self):
+        rebuild(top_k=3)
+        recipe = self.recipes[0]
+        response = self.client.get(f"/api/recipes/{recipe.pk}/similar/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["id"] for item in response.data],
+            list(
+                recipe.neighbors.order_by("rank").values_list(
+                    "similar_id", flat=True
+                )
+            ),
+        )
+
+    def test_missing_recipe_is_404(self):
+        missing = max(recipe.pk for recipe in self.recipes) + 1
+        response = self.client.get(f"/api/recipes/{missing}/similar/")
+        self.assertEqual(response.status_code, 404)
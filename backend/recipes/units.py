@@ -0,0 +1,25 @@
+UNITS = {
+    "г": ("г", 1),
+    "кг": ("г", 1000),
+    "мл": ("мл", 1),
+    "л": ("мл", 1000),
+    "ч. л.": ("мл", 5),
+    "ст. л.": ("мл", 15),
+    "стакан": ("мл", 250),
+}
+
+
+def to_base(unit):
+    """Базовая единица и множитель перевода в неё."""
+    unit = unit.strip()
+    return UNITS.get(unit, (unit, 1))
+
+
+def conversion_factor(unit, target):
+    """Во сколько раз единица unit больше target или None,
+    если единицы несовместимы."""
+    base, factor = to_base(unit)
+    target_base, target_factor = to_base(target)
+    if base != target_base:
+        return None
+    return factor / target_factor
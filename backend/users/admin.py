@@ -1,19 +1,40 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
+from api.pagination import EstimatedCountPaginator
+from recipes.deletion import DeletionAdminMixin
+from recipes.models import Recipe
 from users.models import CustomUser, Follow
 
 admin.site.unregister(Group)
 
 
+def count_related(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на пользователя."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
 class FollowInline(admin.TabularInline):
     model = Follow
     extra = 1
     fk_name = "user"
+    autocomplete_fields = ("author",)
 
 
 @admin.register(CustomUser)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(DeletionAdminMixin, admin.ModelAdmin):
     inlines = (FollowInline,)
     list_display = (
         "id",
@@ -25,19 +46,35 @@ class UserAdmin(admin.ModelAdmin):
     )
     list_display_links = ("username",)
     search_fields = ("username", "email")
-    list_filter = ("username", "email")
+    list_filter = ("is_staff",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                recipes_count=count_related(Recipe, "author"),
+                following_count=count_related(Follow, "author"),
+                followers_count=count_related(Follow, "user"),
+            )
+        )
 
     def amount_recipes(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
     amount_recipes.short_description = "Кол-во рецептов"
+    amount_recipes.admin_order_field = "recipes_count"
 
     def amount_following(self, obj):
-        return obj.following.count()
+        return obj.following_count
 
     amount_following.short_description = "Кол-во подписчиков"
+    amount_following.admin_order_field = "following_count"
 
     def amount_followers(self, obj):
-        return obj.follower.count()
+        return obj.followers_count
 
     amount_followers.short_description = "Кол-во подписок"
+    amount_followers.admin_order_field = "followers_count"
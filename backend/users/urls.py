@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import CustomUserViewSet, FollowListView, FollowViewSet
+from api.views import (CustomUserViewSet, FollowBulkView, FollowListView,
+                       FollowViewSet, TokenCacheStatsView)
 
 router = DefaultRouter()
 router.register("users", CustomUserViewSet, basename="users")
@@ -12,11 +13,21 @@ urlpatterns = [
         FollowListView.as_view(),
         name="subscriptions",
     ),
+    path(
+        "users/subscribe/bulk/",
+        FollowBulkView.as_view(),
+        name="subscribe_bulk",
+    ),
     path(
         "users/<int:pk>/subscribe/",
         FollowViewSet.as_view(),
         name="subscribe",
     ),
+    path(
+        "auth/token/stats/",
+        TokenCacheStatsView.as_view(),
+        name="token_cache_stats",
+    ),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
@@ -396,7 +396,35 @@ class Api {
           'authorization': `Token ${token}`
         }
       }
-    ).then(this.checkFileDownloadResponse)
+    ).then(res => {
+      // 202 - файл ещё готовится, ждём готовности задачи выгрузки
+      if (res.status === 202) {
+        return res.json().then(job => this.waitForExport(job.id, token))
+      }
+      return this.checkFileDownloadResponse(res)
+    })
+  }
+
+  waitForExport (id, token, attempts = 60) {
+    const headers = {
+      ...this._headers,
+      'authorization': `Token ${token}`
+    }
+    return new Promise(resolve => setTimeout(resolve, 1000))
+      .then(() => fetch(`/api/exports/${id}/`, { method: 'GET', headers }))
+      .then(this.checkResponse)
+      .then(job => {
+        if (job.status === 'done') {
+          return fetch(
+            `/api/exports/${id}/download/`,
+            { method: 'GET', headers }
+          ).then(this.checkFileDownloadResponse)
+        }
+        if (job.status === 'failed' || attempts <= 1) {
+          return Promise.reject(job)
+        }
+        return this.waitForExport(id, token, attempts - 1)
+      })
   }
 }
 